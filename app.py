@@ -6,14 +6,179 @@ import subprocess
 import threading
 import time
 from http.server import HTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
 import serial
 import serial.tools.list_ports
-from image_handler import processing_complete
-# from firebase_storage import sync_data, upload_all_data, download_all_data, sync_images
+from image_handler import extract_image
+from search_index import SearchIndex
+from catalog_model import Cocktail, load_cocktails, dump_cocktails
+from data_bundle import data_files_lock
+from catalog_snapshot import open_catalog
+from response_cache import ResponseCache
+from build_catalog import current_file_path as catalog_build_path, read_artifact, read_category, read_product, schedule_build
+from transcode import choose_variant
+from status_channel import DONE, ERROR, PROCESSING, StatusBoard, StatusReporter, StatusServer, new_job_id
+from sync_journal import record_change
+from firebase_storage import network, start_sync_worker, sync_status
+from update_checker import UpdateChecker
 
 # Define the base directory as the directory where this script is located
 base_dir = os.path.dirname(__file__)
 web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+db_path = os.path.join(web_dir, "db.json")
+products_path = os.path.join(web_dir, "products.json")
+config_path = os.path.join(web_dir, "config.json")
+
+# Cache for responses that are pure functions of the data files
+response_cache = ResponseCache()
+response_cache.register_source("db", db_path)
+response_cache.register_source("products", products_path)
+response_cache.register_source("config", config_path)
+response_cache.register_source("build", catalog_build_path)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Data files served straight from the cache, and the source each one is
+CACHED_FILES = {
+    "/db.json": "db",
+    "/products.json": "products",
+    "/config.json": "config",
+}
+
+# Data files that `build-catalog` prebuilds in minified and compressed form
+PREBUILT_FILES = {"/db.json", "/products.json"}
+
+# Image-processing jobs: extracted in-request here, or reported by a
+# standalone image_handler watcher over the status socket
+processing_status = StatusBoard()
+status_server = StatusServer(processing_status)
+status_reporter = StatusReporter(board=processing_status)
+
+# Fetches the git remote on a schedule so /check-updates never waits long on the network
+update_checker = UpdateChecker()
+UPDATE_CHECK_WAIT = 3  # Seconds /check-updates waits for a check it started
+
+# Set when the Arduino reports the drink being poured as completed
+drink_complete = threading.Event()
+
+# Server-side search index, built on first use and updated on every write
+search_index = None
+search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the shared search index, (re)loading it if the data files changed on disk."""
+    global search_index
+    with search_index_lock:
+        if search_index is None:
+            search_index = SearchIndex()
+            search_index.load_files(products_path, db_path)
+        else:
+            search_index.refresh_if_stale(products_path, db_path)
+        return search_index
+
+
+def extract_images(items, type_):
+    """Extract the uploaded images of `items` as one tracked job; returns the job ID."""
+    job_id = new_job_id(type_)
+    status_reporter.start_job(job_id, len(items))
+    try:
+        for position, item in enumerate(items):
+            status_reporter.item(job_id, str(position), PROCESSING)
+            try:
+                extract_image(item, type_)
+            except Exception:
+                status_reporter.item(job_id, str(position), ERROR)
+                raise
+            status_reporter.item(job_id, str(position), DONE)
+    except Exception as e:
+        status_reporter.finish_job(job_id, error=e)
+        raise
+    status_reporter.finish_job(job_id)
+    return job_id
+
+
+def read_file_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def build_makeable_response():
+    """List the cocktails the configured ingredients can make, as in showAvailableCocktails."""
+    with open(config_path, "r") as f:
+        available = set(json.load(f).get("selectedIngredients", []))
+
+    with open_catalog(products_path, db_path) as snapshot:
+        ingredient_types = {i.get("ING_Name"): i.get("ING_Type") for i in snapshot.ingredients}
+        makeable = []
+        for cocktail in snapshot.products:
+            for ingredient in cocktail.get("PIng") or []:
+                name = ingredient.get("ING_Name")
+                # Garnishes and anything not measured in ml are optional
+                if ingredient_types.get(name) == "Garnish":
+                    continue
+                if "ml" not in (ingredient.get("ING_ML") or "").lower():
+                    continue
+                if name not in available:
+                    break
+            else:
+                makeable.append(cocktail.get("PID"))
+
+    return json.dumps({"PIDs": makeable}).encode(), JSON_HEADERS
+
+
+def build_ingredient_usage_response():
+    """Count how many cocktails use each ingredient, keyed by ING_NID."""
+    built = read_artifact("ingredient_usage.json")
+    if built is not None:
+        return built[0], JSON_HEADERS
+
+    usage = {}
+    with open_catalog(products_path, db_path) as snapshot:
+        for cocktail in snapshot.products:
+            for ingredient in cocktail.get("PIng") or []:
+                key = ingredient.get("ING_NID") or ingredient.get("ING_Name")
+                usage[key] = usage.get(key, 0) + 1
+    return json.dumps(usage).encode(), JSON_HEADERS
+
+
+def build_data_file_response(request_path, source, accepted_encodings):
+    """Serve a data file from the current catalog build if it is fresh, else from disk."""
+    if request_path in PREBUILT_FILES:
+        built = read_artifact(request_path.lstrip("/"), ",".join(accepted_encodings))
+        if built is not None:
+            body, encoding = built
+            headers = dict(JSON_HEADERS)
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            headers["Vary"] = "Accept-Encoding"
+            return body, headers
+    return read_file_bytes(response_cache.sources[source]), JSON_HEADERS
+
+
+def build_product_response(pid):
+    """One product by PID, sliced from the prebuilt catalog when possible."""
+    body = read_product(pid)
+    if body is None:
+        with open_catalog(products_path, db_path) as snapshot:
+            product = snapshot.product_by_pid(int(pid) if pid.isdigit() else pid)
+            body = json.dumps(product.to_dict() if product is not None else None).encode()
+    return body, JSON_HEADERS
+
+
+def build_category_response(category, accepted_encodings):
+    """All products in one PCat, from the prebuilt slice when possible."""
+    built = read_category(category, ",".join(accepted_encodings))
+    if built is not None:
+        body, encoding = built
+        headers = dict(JSON_HEADERS)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+        return body, headers
+    with open_catalog(products_path, db_path) as snapshot:
+        products = [p.to_dict() for p in snapshot.products if p.get("PCat") == category]
+    return json.dumps(products).encode(), JSON_HEADERS
 
 
 class CustomHandler(SimpleHTTPRequestHandler):
@@ -33,29 +198,126 @@ class CustomHandler(SimpleHTTPRequestHandler):
         self.send_header("Expires", "0")
         self.send_header("Access-Control-Allow-Origin", "*")
 
+    def send_cached(self, body, headers):
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_no_cache_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_image(self, request_path, immutable):
+        """Send an image, or its smallest WebP/AVIF variant the client accepts."""
+        source = os.path.realpath(self.translate_path(request_path))
+        width = parse_qs(urlsplit(self.path).query).get("w", [""])[0]
+        try:
+            if not source.startswith(os.path.realpath(web_dir) + os.sep):
+                raise OSError("Outside the static folder")
+            variant = choose_variant(source, self.headers.get("Accept", ""),
+                                     int(width) if width.isdigit() else None)
+            path, content_type = variant or (source, self.guess_type(request_path))
+            with open(path, "rb") as f:
+                content = f.read()
+        except OSError:
+            self.send_error(404, "Image not found")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Vary", "Accept")
+        if immutable:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_no_cache_headers()
+        self.end_headers()
+        self.wfile.write(content)
+
     def do_GET(self):
-        if self.path == "processing_complete":
-            try:
-                # Check if processing is complete by checking the event
-                if processing_complete.is_set():
-                    self.send_response(200)
-                    self.send_no_cache_headers()
-                    self.end_headers()
-                else:
-                    self.send_response(404)
-                    self.send_no_cache_headers()
-                    self.end_headers()
-            except Exception as e:
-                self.send_response(500)
+        request_path = urlsplit(self.path).path
+        if request_path == "/api/search":
+            self.handle_search()
+            return
+
+        if request_path in CACHED_FILES:
+            source = CACHED_FILES[request_path]
+            accept = self.headers.get("Accept-Encoding", "")
+            accepted = tuple(e for e in ("br", "gzip") if e in accept)
+            body, headers = response_cache.get_or_compute(
+                (request_path, accepted), (source, "build"),
+                lambda: build_data_file_response(request_path, source, accepted),
+            )
+            self.send_cached(body, headers)
+            return
+
+        if request_path == "/api/makeable":
+            body, headers = response_cache.get_or_compute(
+                "makeable", ("products", "db", "config"), build_makeable_response
+            )
+            self.send_cached(body, headers)
+            return
+
+        if request_path == "/api/ingredient-usage":
+            body, headers = response_cache.get_or_compute(
+                "ingredient-usage", ("products", "build"), build_ingredient_usage_response
+            )
+            self.send_cached(body, headers)
+            return
+
+        if request_path == "/api/catalog/product":
+            pid = parse_qs(urlsplit(self.path).query).get("pid", [""])[0]
+            body, headers = response_cache.get_or_compute(
+                ("product", pid), ("products", "db", "build"), lambda: build_product_response(pid)
+            )
+            self.send_cached(body, headers)
+            return
+
+        if request_path == "/api/catalog/category":
+            name = parse_qs(urlsplit(self.path).query).get("name", [""])[0]
+            accept = self.headers.get("Accept-Encoding", "")
+            accepted = tuple(e for e in ("br", "gzip") if e in accept)
+            body, headers = response_cache.get_or_compute(
+                ("category", name, accepted), ("products", "db", "build"),
+                lambda: build_category_response(name, accepted),
+            )
+            self.send_cached(body, headers)
+            return
+
+        if request_path == "/api/cache-stats":
+            self.send_cached(json.dumps(response_cache.stats()).encode(), JSON_HEADERS)
+            return
+
+        if request_path == "/sync-status":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_no_cache_headers()
+            self.end_headers()
+            self.wfile.write(json.dumps(sync_status()).encode())
+            return
+
+        if request_path == "/processing-status":
+            job_id = parse_qs(urlsplit(self.path).query).get("job", [None])[0]
+            if job_id is not None:
+                job = processing_status.get(job_id)
+                self.send_response(200 if job is not None else 404)
+                self.send_header("Content-Type", "application/json")
                 self.send_no_cache_headers()
                 self.end_headers()
-                self.wfile.write(str(e).encode())
+                self.wfile.write(json.dumps(job or {"error": "Unknown job"}).encode())
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_no_cache_headers()
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                "busy": processing_status.busy(),
+                "jobs": processing_status.snapshot(),
+            }).encode())
             return
 
         if self.path == "/check-completion":
             try:
                 # Check if processing is complete by checking the event
-                if processing_complete.is_set():
+                if drink_complete.is_set():
                     self.send_response(200)
                     self.send_no_cache_headers()
                     self.end_headers()
@@ -72,12 +334,17 @@ class CustomHandler(SimpleHTTPRequestHandler):
                 self.wfile.write(json.dumps({"error": str(e)}).encode())
             return
 
-        # For db.json and image requests, prevent caching
-        if (
-            self.path.endswith(".json")
-            or self.path.endswith(".png")
-            or self.path.endswith(".jpg")
-        ):
+        # Store blobs are named by their content hash, so they never change
+        if request_path.startswith("/img/store/") and not request_path.endswith(".json"):
+            self.send_image(request_path, immutable=True)
+            return
+
+        if request_path.endswith((".png", ".jpg")):
+            self.send_image(request_path, immutable=False)
+            return
+
+        # For db.json requests, prevent caching
+        if self.path.endswith(".json"):
             self.send_response(200)
             self.send_no_cache_headers()
             with open(self.translate_path(self.path), "rb") as f:
@@ -85,61 +352,45 @@ class CustomHandler(SimpleHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(content)
             return
-            
+
         # Check for updates endpoint
         elif self.path == "/check-updates":
-            try:
-                # Run git fetch to check for updates
-                result = subprocess.run(
-                    ["git", "fetch", "origin"],
-                    cwd=base_dir,
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Check if there are updates available
-                result = subprocess.run(
-                    ["git", "rev-list", "HEAD...origin/main", "--count"],
-                    cwd=base_dir,
-                    capture_output=True,
-                    text=True
-                )
-                
-                commit_count = int(result.stdout.strip())
-                
-                if commit_count > 0:
-                    # Get the latest commit message
-                    result = subprocess.run(
-                    ["git", "log", "-1", "origin/main", "--pretty=format:%s"],
-                    cwd=base_dir,
-                    capture_output=True,
-                    text=True
-                    )
-                    
-                    commit_message = result.stdout.strip()
-                    
-                    self.send_response(200)
-                    self.send_header("Content-Type", "application/json")
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
-                    "hasUpdates": True,
-                    "message": f"New updates available ({commit_count} commits). Latest: {commit_message}"
-                    }).encode())
-                else:
-                    self.send_response(200)
-                    self.send_header("Content-Type", "application/json")
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
-                    "hasUpdates": False,
-                    "message": "No updates available"
-                    }).encode())
-            except Exception as e:
-                print(f"Error checking for updates: {e}")
+            # Answered from the background checker's cache. A click on a stale cache
+            # starts a check and waits briefly for it; a slow fetch keeps running
+            # in the background and the page asks again while "checking" is set.
+            status = update_checker.status(refresh_after=60, wait=UPDATE_CHECK_WAIT)
+            result = status["result"]
+            if result is None and status["error"] and not status["checking"]:
                 self.send_response(500)
                 self.send_header("Content-Type", "application/json")
                 self.end_headers()
                 self.wfile.write(json.dumps({
-                    "error": str(e)
+                    "error": status["error"]
+                }).encode())
+            elif result is None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_no_cache_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    "hasUpdates": False,
+                    "checking": True,
+                    "message": "Still checking for updates"
+                }).encode())
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_no_cache_headers()
+                self.end_headers()
+                if result["commits"] > 0:
+                    message = f"New updates available ({result['commits']} commits). Latest: {result['latest']}"
+                else:
+                    message = "No updates available"
+                self.wfile.write(json.dumps({
+                    "hasUpdates": result["commits"] > 0,
+                    "checking": status["checking"],
+                    "message": message,
+                    "checkedAt": result["checked_at"]
                 }).encode())
             return
 
@@ -149,7 +400,7 @@ class CustomHandler(SimpleHTTPRequestHandler):
     def do_POST(self):
         if self.path == "/delete_processing_flag":
             try:
-                processing_complete.clear()
+                drink_complete.clear()
                 self.send_response(200)
                 self.end_headers()
             except Exception as e:
@@ -181,7 +432,7 @@ class CustomHandler(SimpleHTTPRequestHandler):
                         ser.write(b"CANCEL\n")
                         
                         # Clear the processing complete flag
-                        processing_complete.clear()
+                        drink_complete.clear()
                         
                         self.send_response(200)
                         self.end_headers()
@@ -281,35 +532,50 @@ class CustomHandler(SimpleHTTPRequestHandler):
 
         elif self.path == "/addIngredient":
             self.add_ingredient(post_data)
-            # upload_all_data()
-            # sync_images()
 
         elif self.path == "/addCocktail":
-            self.add_cocktail(post_data)
-            # upload_all_data()
-            # sync_images()
+            message, status = self.add_cocktail(post_data)
+            self.send_response(status)
+            self.end_headers()
+            self.wfile.write(message.encode())
 
         elif self.path == "/send-pipes":
             self.handle_send_pipes(post_data)
-            # upload_all_data()
-            # sync_images()
             return
         
         elif self.path == "/save-config":
             self.save_config(post_data)
-            # upload_all_data()
-            # sync_images()
 
         elif self.path == "/updateIngredients":
             self.update_ingredients(post_data)
-            # upload_all_data()
-            # sync_images()
 
         else:
             self.send_response(404)
             self.end_headers()
             self.wfile.write(b"Not Found")
 
+    def handle_search(self):
+        try:
+            query = parse_qs(urlsplit(self.path).query)
+            q = query.get("q", [""])[0]
+            kind = query.get("type", [None])[0]
+            limit = max(1, min(int(query.get("limit", ["20"])[0]), 100))
+
+            def compute():
+                results = get_search_index().search(q, kind=kind, limit=limit)
+                return json.dumps({"query": q, "results": results}).encode(), JSON_HEADERS
+
+            body, headers = response_cache.get_or_compute(
+                ("search", q, kind, limit), ("products", "db"), compute
+            )
+            self.send_cached(body, headers)
+        except Exception as e:
+            print(f"Error searching: {e}")
+            self.send_response(500)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": str(e)}).encode())
+
     def execute_shell_script(self, script_name):
         # Run scripts from the same directory as the Python script
         script_path = os.path.join(base_dir, script_name)
@@ -322,20 +588,22 @@ class CustomHandler(SimpleHTTPRequestHandler):
     def save_config(self, post_data):
         try:
             config_data = json.loads(post_data)
-            config_path = os.path.join(web_dir, "config.json")
             
-            # Load existing config if it exists
-            existing_config = {}
-            if os.path.exists(config_path):
-                with open(config_path, "r") as file:
-                    existing_config = json.load(file)
+            with data_files_lock:
+                # Load existing config if it exists
+                existing_config = {}
+                if os.path.exists(config_path):
+                    with open(config_path, "r") as file:
+                        existing_config = json.load(file)
             
-            # Merge new config with existing config
-            merged_config = {**existing_config, **config_data}
+                # Merge new config with existing config
+                merged_config = {**existing_config, **config_data}
             
-            # Write the merged configuration data to config.json
-            with open(config_path, "w") as file:
-                json.dump(merged_config, file, indent=2)
+                # Write the merged configuration data to config.json
+                with open(config_path, "w") as file:
+                    json.dump(merged_config, file, indent=2)
+            response_cache.bump("config")
+            record_change(config_path)
 
             self.send_response(200)
             self.end_headers()
@@ -361,25 +629,34 @@ class CustomHandler(SimpleHTTPRequestHandler):
                 if "ING_ML" not in ingredient:
                     ingredient["ING_ML"] = "0"  # Default to 0 if not specified
 
-            # Read existing cocktails
-            products_path = os.path.join(web_dir, "products.json")
-            if not os.path.exists(products_path):
-                print(f"products.json not found at {products_path}")
-                return "Error: products.json file not found", 500
+            with data_files_lock:
+                # Read existing cocktails
+                if not os.path.exists(products_path):
+                    print(f"products.json not found at {products_path}")
+                    return "Error: products.json file not found", 500
+
+                cocktails = load_cocktails(products_path)
 
-            with open(products_path, "r") as f:
-                cocktails = json.load(f)
+                # Check if PID already exists, before an uploaded image is stored for it
+                pid = Cocktail.from_dict(new_cocktail).id
+                if any(cocktail.id == pid for cocktail in cocktails):
+                    return "Cocktail ID already exists", 400
 
-            # Check if PID already exists
-            if any(cocktail["PID"] == new_cocktail["PID"] for cocktail in cocktails):
-                return "Cocktail ID already exists", 400
+                # Store an uploaded image as a file so products.json only holds its path
+                extract_images([new_cocktail], "product")
 
-            # Add the new cocktail
-            cocktails.append(new_cocktail)
+                # Add the new cocktail
+                cocktails.append(Cocktail.from_dict(new_cocktail))
 
-            # Save updated cocktails
-            with open(products_path, "w") as f:
-                json.dump(cocktails, f, indent=2)
+                # Save updated cocktails
+                dump_cocktails(cocktails, products_path, indent=2, ensure_ascii=True)
+            response_cache.bump("products")
+            record_change(products_path)
+            schedule_build()
+
+            index = get_search_index()
+            index.add_cocktail(new_cocktail)
+            index.mark_fresh(products_path)
 
             return "Cocktail added successfully", 200
         except Exception as e:
@@ -402,38 +679,44 @@ class CustomHandler(SimpleHTTPRequestHandler):
                 self.wfile.write(b"Invalid ingredient data format")
                 return
 
-            # Load existing ingredients from db.json
-            db_path = os.path.join(web_dir, "db.json")
-            if not os.path.exists(db_path):
-                print(f"db.json not found at {db_path}")
-                self.send_response(500)
-                self.end_headers()
-                self.wfile.write(b"Error: db.json file not found")
-                return
+            # Store an uploaded image as a file so db.json only holds its path
+            extract_images([new_ingredient], "ingredient")
 
-            with open(db_path, "r") as file:
-                file_content = file.read()
-                if not file_content:
-                    data = []
-                else:
-                    data = json.loads(file_content)
+            with data_files_lock:
+                # Load existing ingredients from db.json
+                if not os.path.exists(db_path):
+                    print(f"db.json not found at {db_path}")
+                    self.send_response(500)
+                    self.end_headers()
+                    self.wfile.write(b"Error: db.json file not found")
+                    return
 
-            # Parse the new ingredient data
-            new_ingredient = json.loads(post_data)
+                with open(db_path, "r") as file:
+                    file_content = file.read()
+                    if not file_content:
+                        data = []
+                    else:
+                        data = json.loads(file_content)
 
-            # Append the new ingredient to the existing data
-            if not isinstance(data, list):
-                data = []
-            data.append(new_ingredient)
+                # Append the new ingredient to the existing data
+                if not isinstance(data, list):
+                    data = []
+                data.append(new_ingredient)
 
-            # Write the updated data back to db.json
-            with open(os.path.join(web_dir, "db.json"), "w") as file:
-                json.dump(data, file, indent=2)
+                # Write the updated data back to db.json
+                with open(db_path, "w") as file:
+                    json.dump(data, file, indent=2)
+            response_cache.bump("db")
+            record_change(db_path)
+            schedule_build()
 
-                # Wait for image processing to complete (with timeout)
-                self.send_response(201)
-                self.end_headers()
-                self.wfile.write(b"Ingredient added successfully")
+            index = get_search_index()
+            index.add_ingredient(new_ingredient)
+            index.mark_fresh(db_path)
+
+            self.send_response(201)
+            self.end_headers()
+            self.wfile.write(b"Ingredient added successfully")
 
         except Exception as e:
             print(f"Error adding ingredient: {e}")  # Log the error to the console
@@ -482,7 +765,7 @@ class CustomHandler(SimpleHTTPRequestHandler):
                             response = ser.readline().decode().strip()
                             print(f"Arduino status: {response}")
                             if response == "COMPLETED":
-                                processing_complete.set()  # Set the completion flag
+                                drink_complete.set()  # Set the completion flag
                                 self.send_response(200)
                                 self.end_headers()
                                 self.wfile.write(json.dumps({"status": "COMPLETED"}).encode())
@@ -507,10 +790,19 @@ class CustomHandler(SimpleHTTPRequestHandler):
         try:
             # Parse the updated ingredients data
             updated_ingredients = json.loads(post_data)
+            extract_images(updated_ingredients, "ingredient")
             
-            # Write the updated data back to db.json
-            with open(os.path.join(web_dir, "db.json"), "w") as file:
-                json.dump(updated_ingredients, file, indent=2)
+            with data_files_lock:
+                # Write the updated data back to db.json
+                with open(db_path, "w") as file:
+                    json.dump(updated_ingredients, file, indent=2)
+            response_cache.bump("db")
+            record_change(db_path)
+            schedule_build()
+
+            index = get_search_index()
+            index.replace_ingredients(updated_ingredients)
+            index.mark_fresh(db_path)
             
             self.send_response(200)
             self.end_headers()
@@ -588,22 +880,29 @@ def start_electron_app():
     )
     electron_process.communicate()
 
-def start_image_handler():
-    """Start the image handler script in a separate thread."""
-    subprocess.Popen(["python3", os.path.join(base_dir, "image_handler.py")])
+if __name__ == "__main__":
+    # Bring the prebuilt catalog up to date with the data files
+    schedule_build(delay=0)
 
+    # Listen for progress reports from a separately running image_handler
+    status_server.start()
+
+    # Sync with Firebase Storage in the background once the network is up;
+    # changes made while the app runs are uploaded as they are journaled
+    start_sync_worker()
+
+    # Replicate products.json and db.json with the fleet's catalog server, if there is one
+    if os.environ.get("POURPAL_CATALOG_SERVER"):
+        from fleet_sync import start_replica
+        start_replica(os.environ["POURPAL_CATALOG_SERVER"])
+
+    # Look for app updates in the background, and again whenever the network comes back
+    update_checker.start()
+    network.add_listener(lambda online: online and update_checker.check_now())
 
-if __name__ == "__main__":
-    # Sync data with Firebase Storage at startup
-    # sync_data()
-    # # Sync images with Firebase Storage at startup
-    # sync_images()
-    
     # Start the HTTP server in a separate thread
     http_thread = threading.Thread(target=start_http_server)
     http_thread.start()
 
-    start_image_handler()
-
     # Start the Electron app after a slight delay to ensure the server is up
     start_electron_app()
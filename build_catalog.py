@@ -0,0 +1,258 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip variants are always built
+    brotli = None
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
+products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
+build_dir = os.path.join(web_dir, "build")  # Versioned build outputs
+current_file_path = os.path.join(build_dir, "CURRENT")  # Name of the live version
+
+# How many old versions to keep next to the live one
+KEEP_VERSIONS = 2
+
+_build_lock = threading.Lock()
+
+# Pending debounced rebuild started by schedule_build()
+_pending_timer = None
+_timer_lock = threading.Lock()
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _minify(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_") or "other"
+
+
+def _write_variants(out_dir, name, payload, files):
+    """Write payload plus its .gz/.br variants and record them in `files`."""
+    variants = {"identity": payload, "gzip": gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(payload, quality=11)
+
+    entry = {}
+    for encoding, data in variants.items():
+        filename = name + {"identity": "", "gzip": ".gz", "br": ".br"}[encoding]
+        path = os.path.join(out_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        entry[encoding] = {"file": filename, "size": len(data)}
+    files[name] = entry
+
+
+def _replace_file(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def build_catalog(products_path=products_file_path, db_path=db_file_path, out_root=build_dir, force=False):
+    """
+    Build minified, precompressed and indexed catalog artifacts.
+
+    Everything is written to a temporary directory that is renamed to
+    build/<version> once complete, after which build/CURRENT is switched
+    to it, so readers never see a half-written version.
+    """
+    with _build_lock:
+        products_stamp = _source_stamp(products_path)
+        db_stamp = _source_stamp(db_path)
+        with open(products_path, "rb") as f:
+            products_raw = f.read()
+        with open(db_path, "rb") as f:
+            db_raw = f.read()
+
+        version = hashlib.sha256(products_raw + b"\0" + db_raw).hexdigest()[:16]
+        version_dir = os.path.join(out_root, version)
+        current = os.path.join(out_root, "CURRENT")
+        manifest_path = os.path.join(version_dir, "manifest.json")
+
+        if os.path.isdir(version_dir) and not force:
+            # Same content as an existing build; only the stamps may have moved
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            manifest["sources"] = {"products": products_stamp, "db": db_stamp}
+            _replace_file(manifest_path, json.dumps(manifest, indent=2))
+            _replace_file(current, version)
+            return version
+
+        products = json.loads(products_raw)
+        ingredients = json.loads(db_raw)
+
+        os.makedirs(out_root, exist_ok=True)
+        tmp_dir = os.path.join(out_root, f".tmp-{version}-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        files = {}
+
+        # Minified products.json, assembled by hand so each record's byte range is known
+        records = [_minify(p) for p in products]
+        index = {}
+        offset = 1
+        for product, record in zip(products, records):
+            index[str(product.get("PID"))] = [offset, len(record)]
+            offset += len(record) + 1
+        _write_variants(tmp_dir, "products.json", b"[" + b",".join(records) + b"]", files)
+        _write_variants(tmp_dir, "db.json", _minify(ingredients), files)
+        _write_variants(tmp_dir, "products.index.json", _minify(index), files)
+
+        # Per-category slices
+        categories = {}
+        for product in products:
+            categories.setdefault(product.get("PCat") or "Other", []).append(product)
+        category_files = {}
+        for category, items in categories.items():
+            name = f"categories/{_slug(category)}.json"
+            _write_variants(tmp_dir, name, _minify(items), files)
+            category_files[category] = name
+
+        # Ingredient usage, keyed by ING_NID like /api/ingredient-usage
+        usage = {}
+        for product in products:
+            for ingredient in product.get("PIng") or []:
+                key = ingredient.get("ING_NID") or ingredient.get("ING_Name")
+                usage[key] = usage.get(key, 0) + 1
+        _write_variants(tmp_dir, "ingredient_usage.json", _minify(usage), files)
+
+        manifest = {
+            "version": version,
+            "sources": {"products": products_stamp, "db": db_stamp},
+            "files": files,
+            "categories": category_files,
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.isdir(version_dir):
+            shutil.rmtree(version_dir)
+        os.rename(tmp_dir, version_dir)
+        _replace_file(current, version)
+        _prune_old_versions(out_root, version)
+        print(f"Catalog build {version} written to {version_dir}")
+        return version
+
+
+def _prune_old_versions(out_root, keep):
+    versions = []
+    for entry in os.scandir(out_root):
+        if entry.is_dir() and not entry.name.startswith(".") and entry.name != keep:
+            versions.append((entry.stat().st_mtime, entry.path))
+    versions.sort(reverse=True)
+    for _, path in versions[KEEP_VERSIONS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_current_build(products_path=products_file_path, db_path=db_file_path, out_root=build_dir):
+    """
+    Return (version_dir, manifest) for the live build if it matches the
+    data files on disk, or None if there is no build or it is out of date.
+    """
+    try:
+        with open(os.path.join(out_root, "CURRENT"), "r") as f:
+            version = f.read().strip()
+        version_dir = os.path.join(out_root, version)
+        with open(os.path.join(version_dir, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        sources = manifest["sources"]
+        if sources["products"] != _source_stamp(products_path) or sources["db"] != _source_stamp(db_path):
+            return None
+        return version_dir, manifest
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_artifact(name, accept_encoding="", products_path=products_file_path, db_path=db_file_path):
+    """
+    Return (body, content_encoding) for a built artifact, picking the
+    smallest variant the client accepts, or None if no fresh build exists.
+    """
+    build = load_current_build(products_path, db_path)
+    if build is None:
+        return None
+    version_dir, manifest = build
+    entry = manifest["files"].get(name)
+    if entry is None:
+        return None
+
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+    for encoding in ("br", "gzip", "identity"):
+        if encoding in entry and (encoding == "identity" or encoding in accepted):
+            with open(os.path.join(version_dir, entry[encoding]["file"]), "rb") as f:
+                return f.read(), encoding
+    return None
+
+
+def read_product(pid, products_path=products_file_path, db_path=db_file_path):
+    """Return one product's minified JSON sliced out of the built products.json, or None."""
+    build = load_current_build(products_path, db_path)
+    if build is None:
+        return None
+    version_dir, manifest = build
+    with open(os.path.join(version_dir, manifest["files"]["products.index.json"]["identity"]["file"]), "rb") as f:
+        index = json.load(f)
+    position = index.get(str(pid))
+    if position is None:
+        return None
+    offset, length = position
+    with open(os.path.join(version_dir, manifest["files"]["products.json"]["identity"]["file"]), "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def read_category(category, accept_encoding="", products_path=products_file_path, db_path=db_file_path):
+    """Return (body, content_encoding) of a prebuilt category slice, or None."""
+    build = load_current_build(products_path, db_path)
+    if build is None:
+        return None
+    name = build[1]["categories"].get(category)
+    if name is None:
+        return None
+    return read_artifact(name, accept_encoding, products_path, db_path)
+
+
+def schedule_build(delay=1.0):
+    """Rebuild in the background, collapsing writes that arrive within `delay` seconds."""
+    global _pending_timer
+    with _timer_lock:
+        if _pending_timer is not None:
+            _pending_timer.cancel()
+        _pending_timer = threading.Timer(delay, _run_scheduled_build)
+        _pending_timer.daemon = True
+        _pending_timer.start()
+
+
+def _run_scheduled_build():
+    try:
+        build_catalog()
+    except Exception as e:
+        print(f"Error building catalog: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="build-catalog", description="Build prebuilt catalog artifacts.")
+    parser.add_argument("--force", action="store_true", help="rebuild even if this version already exists")
+    args = parser.parse_args()
+    build_catalog(force=args.force)
@@ -0,0 +1,229 @@
+import json
+import os
+import sys
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
+products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
+
+# The model is for code that loads a whole data file, edits it and writes
+# it back (add_cocktail and the maintenance scripts). Read paths in app.py
+# use the memory-mapped snapshot from catalog_snapshot.py instead. Slots,
+# interned names and int IDs make a loaded products.json a little over
+# half the size of its dicts (run this module to measure); descriptions
+# and how-tos, which make up most of what is left, stay plain strings.
+
+# Key orders seen so far, by key count. Records share one tuple per
+# distinct layout instead of each carrying its own dict of keys.
+_shapes = {}
+
+
+def _shape(keys, id_key, id_value):
+    """Return the shared (keys, id_was_str) tuple describing a record's layout."""
+    id_was_str = isinstance(id_value, str)
+    # A catalog has a handful of layouts, so comparing in place beats building a tuple per record
+    candidates = _shapes.setdefault(len(keys), [])
+    for shape in candidates:
+        if shape[1] == id_was_str and all(a == b for a, b in zip(shape[0], keys)):
+            return shape
+    shape = (tuple(sys.intern(k) for k in keys), id_was_str)
+    candidates.append(shape)
+    return shape
+
+
+# Repeated values (names, NIDs, measures). A table of our own rather than
+# sys.intern, whose interpreter-wide table would grow by far more than the
+# catalog's few hundred strings take.
+_strings = {}
+
+
+def _intern(value):
+    return _strings.setdefault(value, value) if isinstance(value, str) else value
+
+
+def _parse_id(value):
+    """Turn IDs such as "104" into 104; anything that wouldn't round-trip is kept as is."""
+    if isinstance(value, str) and value.isdigit() and str(int(value)) == value:
+        return int(value)
+    return value
+
+
+def _format_id(value, was_str):
+    if was_str and isinstance(value, int):
+        return str(value)
+    return value
+
+
+class _Record:
+    """
+    Base for the slotted catalog records.
+
+    Subclasses list their JSON keys in FIELDS as (json_key, attribute)
+    pairs. Keys outside FIELDS are kept in `extra`, and the original key
+    order in `shape`, so to_dict() reproduces the source record.
+    """
+
+    __slots__ = ("shape", "extra")
+    FIELDS = ()
+    ID_KEY = None
+    INTERNED = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        known = dict(cls.FIELDS)
+        for key, attr in cls.FIELDS:
+            value = data.get(key)
+            if key == cls.ID_KEY:
+                value = _parse_id(value)
+            elif attr in cls.INTERNED:
+                value = _intern(value)
+            setattr(record, attr, value)
+        record.shape = _shape(data.keys(), cls.ID_KEY, data.get(cls.ID_KEY))
+        extra = {k: v for k, v in data.items() if k not in known}
+        record.extra = extra or None
+        return record
+
+    def to_dict(self):
+        keys, id_was_str = self.shape
+        attrs = dict(self.FIELDS)
+        result = {}
+        for key in keys:
+            attr = attrs.get(key)
+            if attr is None:
+                result[key] = self.extra[key]
+            elif key == self.ID_KEY:
+                result[key] = _format_id(getattr(self, attr), id_was_str)
+            else:
+                result[key] = getattr(self, attr)
+        self._add_new_fields(result)
+        return result
+
+    def _add_new_fields(self, result):
+        # Fields set after loading that the source record didn't have
+        for key, attr in self.FIELDS:
+            if key not in result and getattr(self, attr) is not None:
+                result[key] = getattr(self, attr)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class RecipeIngredient(_Record):
+    """One entry of a cocktail's PIng list."""
+
+    __slots__ = ("name", "id", "ml", "nid")
+    FIELDS = (("ING_Name", "name"), ("ING_ID", "id"), ("ING_ML", "ml"), ("ING_NID", "nid"))
+    ID_KEY = "ING_ID"
+    INTERNED = ("name", "nid", "ml")
+
+
+class Ingredient(_Record):
+    """One ingredient from db.json."""
+
+    __slots__ = ("id", "name", "type", "image", "remark", "nid")
+    FIELDS = (("ING_ID", "id"), ("ING_Name", "name"), ("ING_Type", "type"),
+              ("ING_IMG", "image"), ("ING_Remark", "remark"), ("ING_NID", "nid"))
+    ID_KEY = "ING_ID"
+    INTERNED = ("name", "type", "nid")
+
+
+class Cocktail(_Record):
+    """One cocktail from products.json."""
+
+    __slots__ = ("id", "name", "image", "category", "desc", "htm", "nid", "ingredients")
+    FIELDS = (("PID", "id"), ("PName", "name"), ("PImage", "image"), ("PCat", "category"),
+              ("PDesc", "desc"), ("PHtm", "htm"), ("PNID", "nid"))
+    ID_KEY = "PID"
+    INTERNED = ("category", "nid")
+
+    @classmethod
+    def from_dict(cls, data):
+        record = super().from_dict({k: v for k, v in data.items() if k != "PIng"})
+        # Re-derive the shape so PIng keeps its place in the key order
+        record.shape = _shape(data.keys(), cls.ID_KEY, data.get(cls.ID_KEY))
+        ingredients = data.get("PIng")
+        record.ingredients = None if ingredients is None else [RecipeIngredient.from_dict(i) for i in ingredients]
+        return record
+
+    def to_dict(self):
+        keys, id_was_str = self.shape
+        attrs = dict(self.FIELDS)
+        result = {}
+        for key in keys:
+            if key == "PIng":
+                result[key] = None if self.ingredients is None else [i.to_dict() for i in self.ingredients]
+            elif key == self.ID_KEY:
+                result[key] = _format_id(self.id, id_was_str)
+            elif key in attrs:
+                result[key] = getattr(self, attrs[key])
+            else:
+                result[key] = self.extra[key]
+        self._add_new_fields(result)
+        if "PIng" not in result and self.ingredients is not None:
+            result["PIng"] = [i.to_dict() for i in self.ingredients]
+        return result
+
+
+def load_cocktails(path=products_file_path):
+    """Load products.json as a list of Cocktail records."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [Cocktail.from_dict(c) for c in json.load(f)]
+
+
+def load_ingredients(path=db_file_path):
+    """Load db.json as a list of Ingredient records."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [Ingredient.from_dict(i) for i in json.load(f)]
+
+
+def dump_records(records, path, indent=4, ensure_ascii=True):
+    """Write records back out as the same JSON they were loaded from."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([r.to_dict() for r in records], f, indent=indent, ensure_ascii=ensure_ascii)
+
+
+def dump_cocktails(cocktails, path=products_file_path, indent=4, ensure_ascii=True):
+    dump_records(cocktails, path, indent=indent, ensure_ascii=ensure_ascii)
+
+
+def dump_ingredients(ingredients, path=db_file_path, indent=2, ensure_ascii=True):
+    dump_records(ingredients, path, indent=indent, ensure_ascii=ensure_ascii)
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    for label, loader, raw_path in (("products.json", load_cocktails, products_file_path),
+                                     ("db.json", load_ingredients, db_file_path)):
+        with open(raw_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        # Load once untraced, so the interpreter's free lists are already
+        # filled and only what the records keep is counted
+        loader(raw_path)
+        _strings.clear()
+
+        tracemalloc.start()
+        with open(raw_path, "r", encoding="utf-8") as f:
+            as_dicts = json.load(f)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        records = loader(raw_path)
+        elapsed = time.perf_counter() - start
+        record_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        assert [r.to_dict() for r in records] == raw, f"{label} did not round-trip"
+        print(f"{label}: {len(records)} records, dicts {dict_bytes / 1024:.0f} KiB, "
+              f"records {record_bytes / 1024:.0f} KiB ({dict_bytes / record_bytes:.1f}x smaller), "
+              f"loaded in {elapsed * 1000:.1f} ms")
+        del as_dicts
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(base_dir, "catalog_server_data")
+
+# Most changes returned by one /changes request
+MAX_BATCH = 1000
+
+# Record kinds and the field that identifies each record
+KINDS = {
+    "product": "PID",
+    "ingredient": "ING_ID",
+}
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ChangeLog:
+    """
+    Versioned log of catalog changes shared by a fleet of units.
+
+    Every accepted change gets the next version number. Only the newest
+    change per record is kept, so a unit that asks for everything since
+    version N gets each changed record once, however often it changed,
+    and a new unit (N = 0) gets exactly the current catalog. The log is
+    an append-only JSONL file, compacted when loaded.
+    """
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR):
+        self.data_dir = data_dir
+        self.log_path = os.path.join(data_dir, "changes.jsonl")
+        self.blob_dir = os.path.join(data_dir, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.version = 0
+        self.latest = OrderedDict()  # (kind, id) -> change, oldest version first
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line
+                    key = (change["kind"], change["id"])
+                    self.latest.pop(key, None)
+                    self.latest[key] = change
+                    self.version = max(self.version, change["version"])
+        except FileNotFoundError:
+            return
+        # Rewrite the log without superseded changes
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for change in self.latest.values():
+                f.write(json.dumps(change, separators=(",", ":"), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.log_path)
+
+    def changes_since(self, since, limit=MAX_BATCH):
+        """Return (changes newer than since, oldest first, at most limit; whether more remain)."""
+        with self.lock:
+            newer = []
+            for change in reversed(self.latest.values()):
+                if change["version"] <= since:
+                    break
+                newer.append(change)
+        newer.reverse()
+        return newer[:limit], len(newer) > limit
+
+    def apply(self, changes):
+        """
+        Append changes ({"kind", "id", "op": "put"/"delete", "record",
+        "images": {web path: sha256}}, images naming the blobs the record
+        refers to). Changes that would not alter the record are dropped,
+        so a unit pushing back what it just pulled costs nothing. Returns
+        the versions given to the accepted ones.
+        """
+        accepted = []
+        with self.lock, open(self.log_path, "a", encoding="utf-8") as f:
+            for change in changes:
+                kind, record_id, op = change.get("kind"), change.get("id"), change.get("op")
+                if kind not in KINDS or record_id is None or op not in ("put", "delete"):
+                    raise ValueError(f"Invalid change: {change}")
+                key = (kind, str(record_id))
+                current = self.latest.get(key)
+                record = change.get("record") if op == "put" else None
+                if (current is None and op == "delete") or (current is not None and current["op"] == op
+                                                            and current.get("record") == record):
+                    continue
+                self.version += 1
+                entry = {"version": self.version, "kind": kind, "id": key[1], "op": op}
+                if record is not None:
+                    entry["record"] = record
+                    entry["images"] = change.get("images") or {}
+                f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+                self.latest.pop(key, None)
+                self.latest[key] = entry
+                accepted.append(self.version)
+            f.flush()
+            os.fsync(f.fileno())
+        return accepted
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put_blob(self, digest, data):
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError("Blob content does not match its SHA-256")
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """
+    GET  /changes?since=N&limit=M  changes after version N
+    POST /changes                  {"changes": [...]} -> {"versions": [...], "version": latest}
+    GET  /blobs/<sha256>           image bytes (HEAD to test for presence)
+    PUT  /blobs/<sha256>           upload image bytes
+    """
+
+    log = None  # The ChangeLog, set by serve()
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def blob_digest(self, request_path):
+        digest = request_path[len("/blobs/"):]
+        return digest if SHA256_PATTERN.match(digest) else None
+
+    def do_GET(self, head=False):
+        url = urlsplit(self.path)
+        if url.path == "/changes":
+            query = parse_qs(url.query)
+            try:
+                since = int(query.get("since", ["0"])[0])
+                limit = min(int(query.get("limit", [str(MAX_BATCH)])[0]), MAX_BATCH)
+            except ValueError:
+                self.send_json(400, {"error": "since and limit must be integers"})
+                return
+            changes, more = self.log.changes_since(since, limit)
+            self.send_json(200, {"version": self.log.version, "changes": changes, "more": more})
+        elif url.path.startswith("/blobs/"):
+            digest = self.blob_digest(url.path)
+            path = digest and self.log.blob_path(digest)
+            if not path or not os.path.exists(path):
+                self.send_json(404, {"error": "No such blob"})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.end_headers()
+            if not head:
+                with open(path, "rb") as f:
+                    self.wfile.write(f.read())
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/changes":
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            changes = json.loads(self.read_body()).get("changes", [])
+            versions = self.log.apply(changes)
+        except (ValueError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200, {"versions": versions, "version": self.log.version})
+
+    def do_PUT(self):
+        digest = self.blob_digest(urlsplit(self.path).path)
+        if digest is None:
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            self.log.put_blob(digest, self.read_body())
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200, {"stored": digest})
+
+    def log_message(self, format, *args):
+        pass  # One line per request is too noisy for a fleet polling every few seconds
+
+
+def serve(host="0.0.0.0", port=5100, data_dir=DEFAULT_DATA_DIR):
+    """Create the catalog server; call serve_forever() on the result."""
+    CatalogHandler.log = ChangeLog(data_dir)
+    return ThreadingHTTPServer((host, port), CatalogHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="catalog-server", description="Serve the fleet's shared catalog change log.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where the change log and image blobs are kept")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.data_dir)
+    print(f"Catalog server at version {CatalogHandler.log.version} on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,356 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
+products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
+snapshot_file_path = os.path.join(web_dir, "catalog.bin")  # Path to the compiled snapshot
+
+# Snapshot layout (all integers little-endian):
+#
+#   header   MAGIC, format version, section count, source stamps
+#   sections name(8s) offset(Q) length(Q) for every section below
+#
+#   voff     uint64 offsets into vdat, one per value plus an end marker
+#   vdat     value table: b"s" + utf-8 text, or b"j" + JSON for non-strings
+#   prod     product columns, uint32 value refs, row-major
+#   ping     recipe ingredient columns, uint32 value refs, row-major
+#   ingr     db.json ingredient columns, uint32 value refs, row-major
+#
+# A value ref is an index into the value table or one of the MISSING/NULL
+# sentinels. Every distinct value is stored once, so ingredient names and
+# NIDs repeated across recipes cost four bytes per use.
+
+MAGIC = b"PPCATLG\x00"
+FORMAT_VERSION = 1
+MISSING = 0xFFFFFFFF
+NULL = 0xFFFFFFFE
+
+PRODUCT_COLUMNS = ("PID", "PName", "PImage", "PCat", "PDesc", "PHtm", "PNID")
+PRODUCT_INGREDIENT_COLUMNS = ("ING_Name", "ING_ID", "ING_ML", "ING_NID")
+INGREDIENT_COLUMNS = ("ING_ID", "ING_Name", "ING_Type", "ING_IMG", "ING_Remark", "ING_NID")
+
+# Every row also stores the record's key order ("shape") and any keys
+# outside its fixed columns ("extra") so records round-trip unchanged.
+# Product rows end with the start/count of their PIng rows.
+
+_HEADER = struct.Struct("<8sHHQQQQ")
+_SECTION = struct.Struct("<8sQQ")
+
+
+def _source_stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return 0, 0
+
+
+class _ValueTable:
+    """Deduplicating writer side of the value table."""
+
+    def __init__(self):
+        self.refs = {}
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def ref(self, value):
+        if value is None:
+            return NULL
+        if isinstance(value, str):
+            encoded = b"s" + value.encode("utf-8")
+        else:
+            encoded = b"j" + json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        index = self.refs.get(encoded)
+        if index is None:
+            index = self.refs[encoded] = len(self.offsets) - 1
+            self.data += encoded
+            self.offsets.append(len(self.data))
+        return index
+
+
+def _encode_rows(records, columns, values, ingredient_positions=None):
+    """Flatten records into a row-major uint32 array of value refs."""
+    column_set = set(columns) | {"PIng"}
+    rows = array("I")
+    for i, record in enumerate(records):
+        for column in columns:
+            rows.append(values.ref(record[column]) if column in record else MISSING)
+        rows.append(values.ref(list(record.keys())))
+        extra = {k: v for k, v in record.items() if k not in column_set}
+        rows.append(values.ref(extra) if extra else MISSING)
+        if ingredient_positions is not None:
+            rows.extend(ingredient_positions[i])
+    return rows
+
+
+def compile_snapshot(products_path=products_file_path, db_path=db_file_path, out_path=snapshot_file_path):
+    """Compile products.json and db.json into a binary snapshot, replacing it atomically."""
+    # Stamp before reading, so an edit saved while compiling leaves the snapshot stale
+    products_stamp = _source_stamp(products_path)
+    db_stamp = _source_stamp(db_path)
+    with open(products_path, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    with open(db_path, "r", encoding="utf-8") as f:
+        ingredients = json.load(f)
+
+    values = _ValueTable()
+    recipe_rows = []
+    positions = []
+    for product in products:
+        product_ingredients = product.get("PIng") or []
+        positions.append((len(recipe_rows), len(product_ingredients)))
+        recipe_rows.extend(product_ingredients)
+
+    prod = _encode_rows(products, PRODUCT_COLUMNS, values, positions)
+    ping = _encode_rows(recipe_rows, PRODUCT_INGREDIENT_COLUMNS, values)
+    ingr = _encode_rows(ingredients, INGREDIENT_COLUMNS, values)
+
+    if sys.byteorder != "little":
+        for column in (values.offsets, prod, ping, ingr):
+            column.byteswap()
+
+    sections = [
+        (b"voff", values.offsets.tobytes()),
+        (b"vdat", bytes(values.data)),
+        (b"prod", prod.tobytes()),
+        (b"ping", ping.tobytes()),
+        (b"ingr", ingr.tobytes()),
+    ]
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), *products_stamp, *db_stamp)
+
+    offset = len(header) + _SECTION.size * len(sections)
+    table = bytearray()
+    for name, payload in sections:
+        # Keep every section 8-byte aligned so it can be cast in place
+        offset += -offset % 8
+        table += _SECTION.pack(name, offset, len(payload))
+        offset += len(payload)
+
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+        for name, payload in sections:
+            f.write(b"\x00" * (-f.tell() % 8))
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class RecordView:
+    """Read-only, dict-like view of one row; values are decoded on access."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def keys(self):
+        return self._table.snapshot.value(self._table.refs[self._row * self._table.width + self._table.shape_col])
+
+    def __getitem__(self, key):
+        table = self._table
+        base = self._row * table.width
+        col = table.column_index.get(key)
+        if col is not None:
+            ref = table.refs[base + col]
+            if ref == MISSING:
+                raise KeyError(key)
+            return table.snapshot.value(ref)
+        if key == "PIng" and table.ingredient_rows is not None:
+            start = table.refs[base + table.width - 2]
+            count = table.refs[base + table.width - 1]
+            return [RecordView(table.ingredient_rows, start + i) for i in range(count)]
+        extra_ref = table.refs[base + table.extra_col]
+        if extra_ref != MISSING:
+            extra = table.snapshot.value(extra_ref)
+            if key in extra:
+                return extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Materialise the record exactly as it appears in the JSON file."""
+        result = {}
+        for key in self.keys():
+            value = self[key]
+            if key == "PIng" and self._table.ingredient_rows is not None:
+                value = [row.to_dict() for row in value]
+            result[key] = value
+        return result
+
+    def __repr__(self):
+        return f"RecordView({self.to_dict()!r})"
+
+
+class _Table:
+    """A row-major block of value refs inside the snapshot."""
+
+    def __init__(self, snapshot, refs, columns, has_ingredients=False, ingredient_rows=None):
+        self.snapshot = snapshot
+        self.refs = refs
+        self.columns = columns
+        self.column_index = {name: i for i, name in enumerate(columns)}
+        self.shape_col = len(columns)
+        self.extra_col = len(columns) + 1
+        self.width = len(columns) + 2 + (2 if has_ingredients else 0)
+        self.ingredient_rows = ingredient_rows
+
+    def __len__(self):
+        return len(self.refs) // self.width
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return RecordView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield RecordView(self, row)
+
+    def to_list(self):
+        return [view.to_dict() for view in self]
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped, read-only catalog.
+
+    The file is mapped with ACCESS_READ, so every process that opens the
+    same snapshot shares one copy of it in the page cache. Nothing is
+    decoded until a record field is actually read.
+    """
+
+    def __init__(self, path=snapshot_file_path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, count, *stamps = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a catalog snapshot (version {FORMAT_VERSION})")
+        if sys.byteorder != "little":
+            self.close()
+            raise ValueError("Catalog snapshots can only be mapped on little-endian machines")
+        self.products_stamp = tuple(stamps[0:2])
+        self.db_stamp = tuple(stamps[2:4])
+
+        # Every memoryview into the mapping, released in reverse on close()
+        self._views = [self._view]
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+            sections[name.rstrip(b"\x00")] = self._section(offset, length)
+
+        self._offsets = self._cast(sections[b"voff"], "Q")
+        self._data = sections[b"vdat"]
+        self._cache = {}
+        self._pid_index = None
+
+        recipe_rows = _Table(self, self._cast(sections[b"ping"], "I"), PRODUCT_INGREDIENT_COLUMNS)
+        self.products = _Table(self, self._cast(sections[b"prod"], "I"), PRODUCT_COLUMNS,
+                               has_ingredients=True, ingredient_rows=recipe_rows)
+        self.ingredients = _Table(self, self._cast(sections[b"ingr"], "I"), INGREDIENT_COLUMNS)
+
+    def _section(self, offset, length):
+        view = self._view[offset:offset + length]
+        self._views.append(view)
+        return view
+
+    def _cast(self, view, fmt):
+        cast = view.cast(fmt)
+        self._views.append(cast)
+        return cast
+
+    def value(self, ref):
+        """Decode one entry of the value table."""
+        if ref == NULL:
+            return None
+        cached = self._cache.get(ref)
+        if cached is not None:
+            return cached
+        raw = bytes(self._data[self._offsets[ref]:self._offsets[ref + 1]])
+        if raw[:1] == b"s":
+            value = raw[1:].decode("utf-8")
+        else:
+            value = json.loads(raw[1:])
+        # Only cache immutable values; lists/dicts are handed out fresh
+        if isinstance(value, (str, int, float)):
+            self._cache[ref] = value
+        return value
+
+    def product_by_pid(self, pid):
+        """Look up a product by PID, building the PID index on first use."""
+        if self._pid_index is None:
+            self._pid_index = {view.get("PID"): view._row for view in self.products}
+        row = self._pid_index.get(pid)
+        return None if row is None else self.products[row]
+
+    def is_stale(self, products_path=products_file_path, db_path=db_file_path):
+        """True if the JSON sources changed since this snapshot was compiled."""
+        return (self.products_stamp != _source_stamp(products_path)
+                or self.db_stamp != _source_stamp(db_path))
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        for view in reversed(getattr(self, "_views", [self._view])):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_catalog(products_path=products_file_path, db_path=db_file_path, path=snapshot_file_path):
+    """Open the snapshot, recompiling it first if it is missing or out of date."""
+    try:
+        snapshot = CatalogSnapshot(path)
+        if not snapshot.is_stale(products_path, db_path):
+            return snapshot
+        snapshot.close()
+    except (OSError, ValueError):
+        pass
+    compile_snapshot(products_path, db_path, path)
+    return CatalogSnapshot(path)
+
+
+if __name__ == "__main__":
+    out = compile_snapshot()
+    with CatalogSnapshot(out) as snapshot:
+        print(f"Wrote {out}: {os.path.getsize(out)} bytes, "
+              f"{len(snapshot.products)} products, {len(snapshot.ingredients)} ingredients")
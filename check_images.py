@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from image_store import IMAGE_EXTENSIONS, referenced_images, static_references
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+img_dir = os.path.join(web_dir, "img")  # Path to the img directory
+manifest_path = os.path.join(img_dir, ".integrity.json")  # Cached check results
+
+# Directories holding uploaded images
+SCAN_DIRS = (os.path.join(img_dir, "upload"), os.path.join(img_dir, "store"))
+
+# Anything larger than this is reported as oversized
+MAX_DIMENSION = 2048
+MAX_BYTES = 2 * 1024 * 1024
+
+# Bump when check_image changes so cached results are redone
+MANIFEST_VERSION = 1
+
+# Bytes every complete file of these formats ends with
+TRAILERS = {
+    "PNG": b"IEND\xaeB`\x82",
+    "JPEG": b"\xff\xd9",
+}
+
+
+def check_image(path, deep=False):
+    """
+    Check one image, reading only its header and trailer unless deep is set.
+
+    Returns a dict with format, width and height, plus an "error" entry
+    if the file cannot be read, is truncated or fails to decode.
+    """
+    result = {}
+    try:
+        with Image.open(path) as img:
+            result.update(format=img.format, width=img.width, height=img.height)
+            if deep:
+                img.verify()
+        trailer = TRAILERS.get(result["format"])
+        if trailer is not None:
+            with open(path, "rb") as f:
+                f.seek(max(0, os.path.getsize(path) - 64))
+                if trailer not in f.read():
+                    result["error"] = "truncated"
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+def _check_entry(args):
+    path, deep = args
+    return path, check_image(path, deep)
+
+
+def scan_files(roots=SCAN_DIRS):
+    """Yield (web path, file path, stamp) for every image under roots, via scandir."""
+    stack = [root for root in roots if os.path.isdir(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    st = entry.stat()
+                    web_path = os.path.relpath(entry.path, web_dir).replace("\\", "/")
+                    yield web_path, entry.path, [st.st_mtime_ns, st.st_size]
+
+
+def load_manifest(path=manifest_path):
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+def save_manifest(manifest, path=manifest_path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def scan(roots=SCAN_DIRS, workers=None, deep=False, use_manifest=True):
+    """
+    Check every image under roots, reusing manifest results for files whose
+    (mtime, size) is unchanged. Returns {web path: result with "stamp" and "bytes"}.
+    """
+    manifest = load_manifest() if use_manifest else {"version": MANIFEST_VERSION, "files": {}}
+    cached = manifest["files"]
+    results = {}
+    pending = []
+    for web_path, path, stamp in scan_files(roots):
+        entry = cached.get(web_path)
+        # A deep check also satisfies a quick one, but not the other way round
+        if entry is not None and entry["stamp"] == stamp and (entry.get("deep") or not deep):
+            results[web_path] = entry
+        else:
+            pending.append((web_path, path, stamp))
+
+    if pending:
+        paths = {path: (web_path, stamp) for web_path, path, stamp in pending}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            for path, result in pool.map(_check_entry, [(p, deep) for p in paths], chunksize=chunksize):
+                web_path, stamp = paths[path]
+                result.update(stamp=stamp, bytes=stamp[1], deep=deep)
+                results[web_path] = result
+
+    if use_manifest:
+        manifest["files"] = results
+        save_manifest(manifest)
+    return results
+
+
+def build_report(results, references, max_dimension=MAX_DIMENSION, max_bytes=MAX_BYTES):
+    """Sort scan results into missing, orphaned, corrupt and oversized images."""
+    report = {"missing": {}, "orphaned": [], "corrupt": {}, "oversized": {}}
+    for ref, users in sorted(references.items()):
+        if ref not in results and not os.path.isfile(os.path.join(web_dir, ref)):
+            report["missing"][ref] = [f"{name}#{index}" for name, index in users]
+    used = set(references) | static_references()
+    for web_path, result in sorted(results.items()):
+        if web_path not in used:
+            report["orphaned"].append(web_path)
+        if "error" in result:
+            report["corrupt"][web_path] = result["error"]
+        elif (result["width"] > max_dimension or result["height"] > max_dimension
+              or result["bytes"] > max_bytes):
+            report["oversized"][web_path] = f"{result['width']}x{result['height']}, {result['bytes'] / 1024:.0f} KiB"
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="check-images", description="Check uploaded images against db.json and products.json.")
+    parser.add_argument("--deep", action="store_true", help="also decode images instead of checking headers only")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the results manifest")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    results = scan(workers=args.workers, deep=args.deep, use_manifest=not args.no_cache)
+    references = referenced_images()
+    report = build_report(results, references)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for ref, users in report["missing"].items():
+            print(f"Missing:   {ref} (used by {', '.join(users)})")
+        for web_path, error in report["corrupt"].items():
+            print(f"Corrupt:   {web_path}: {error}")
+        for web_path, detail in report["oversized"].items():
+            print(f"Oversized: {web_path}: {detail}")
+        for web_path in report["orphaned"]:
+            print(f"Orphaned:  {web_path}")
+        print(f"\n{len(results)} images checked, {len(references)} referenced: "
+              f"{len(report['missing'])} missing, {len(report['orphaned'])} orphaned, "
+              f"{len(report['corrupt'])} corrupt, {len(report['oversized'])} oversized")
+
+    # Broken references and unreadable files need fixing; orphans and large files are advisory
+    sys.exit(1 if report["missing"] or report["corrupt"] else 0)
@@ -5,6 +5,8 @@ import re
 from extract_ingredient_ml import normalize_ingredient_name, extract_measurements_from_recipes
 from PIL import Image, ImageTk
 import os
+from search_index import SearchIndex
+from build_catalog import schedule_build
 
 class CocktailMLEditor:
     def __init__(self, root):
@@ -44,6 +46,10 @@ class CocktailMLEditor:
             self.cocktails = []
             self.ingredients_db = []
 
+        # Index cocktails once so filtering doesn't rescan every record per keystroke
+        self.search_index = SearchIndex()
+        self.search_index.replace_cocktails(self.cocktails)
+
     def create_cocktail_list(self):
         # Left panel frame
         left_frame = ttk.LabelFrame(self.main_frame, text="Cocktails", padding="5")
@@ -259,10 +265,14 @@ class CocktailMLEditor:
 
     def update_cocktail_list(self):
         self.cocktail_listbox.delete(0, tk.END)
-        search_text = self.search_var.get().lower()
-        for cocktail in self.cocktails:
-            if search_text in cocktail['PName'].lower():
+        search_text = self.search_var.get().strip()
+        if not search_text:
+            for cocktail in self.cocktails:
                 self.cocktail_listbox.insert(tk.END, cocktail['PName'])
+            return
+        results = self.search_index.search(search_text, kind="cocktail", limit=len(self.cocktails) or 1)
+        for result in results:
+            self.cocktail_listbox.insert(tk.END, result['name'])
 
     def filter_cocktails(self, *args):
         self.update_cocktail_list()
@@ -382,6 +392,8 @@ class CocktailMLEditor:
         try:
             with open('static/products.json', 'w', encoding='utf-8') as f:
                 json.dump(self.cocktails, f, indent=4, ensure_ascii=False)
+            self.search_index.add_cocktail(self.current_cocktail)
+            schedule_build()
             messagebox.showinfo("Success", "Changes saved successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save changes: {str(e)}")
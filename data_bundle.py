@@ -0,0 +1,93 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(base_dir, "static")
+
+# The data files travel as one gzip-encoded object instead of three pretty-printed ones
+BUNDLE_NAME = "data/bundle.json.gz"
+BUNDLE_PATH = os.path.join(STATIC_DIR, ".data_bundle.json.gz")
+BUNDLE_FORMAT = 1
+
+# Files in the bundle, by the name they are stored under in it
+BUNDLE_FILES = {
+    "db.json": os.path.join(STATIC_DIR, "db.json"),
+    "products.json": os.path.join(STATIC_DIR, "products.json"),
+    "config.json": os.path.join(STATIC_DIR, "config.json"),
+}
+
+# Held for every read-modify-write of the data files in this process (the
+# HTTP handlers, fleet replication, bundle downloads), so no rewrite is
+# based on a copy another thread is about to replace
+data_files_lock = threading.RLock()
+
+
+def build_bundle(files=BUNDLE_FILES, bundle_path=BUNDLE_PATH):
+    """
+    Write the data files as one compact, gzipped JSON snapshot and return
+    its base64 MD5. The output depends only on the files' content (no
+    timestamps), so unchanged data always gives the same bytes and hash.
+    """
+    snapshot = {"format": BUNDLE_FORMAT, "files": {}}
+    with data_files_lock:  # Not halfway through a handler's rewrite
+        for name, path in files.items():
+            with open(path, "rb") as f:
+                snapshot["files"][name] = json.loads(f.read() or b"[]")
+    encoded = json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False, sort_keys=True).encode()
+    try:
+        with open(bundle_path, "rb") as f:
+            data = f.read()
+        # Keep the existing bytes when the content is the same, so a bundle
+        # compressed elsewhere (another zlib) doesn't look like a local change
+        if gzip.decompress(data) == encoded:
+            return base64.b64encode(hashlib.md5(data).digest()).decode()
+    except (OSError, EOFError, gzip.BadGzipFile):
+        pass
+    data = gzip.compress(encoded, compresslevel=9, mtime=0)
+    tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, bundle_path)
+    return base64.b64encode(hashlib.md5(data).digest()).decode()
+
+
+def read_bundle(bundle_path=BUNDLE_PATH):
+    """Load a bundle, whether it was stored still gzipped or already decompressed in transit."""
+    with open(bundle_path, "rb") as f:
+        data = f.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    snapshot = json.loads(data)
+    if snapshot.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported data bundle format: {snapshot.get('format')}")
+    return snapshot["files"]
+
+
+def unpack_bundle(bundle_path=BUNDLE_PATH, files=BUNDLE_FILES):
+    """Write out the bundled files that differ from the local ones; returns their names."""
+    changed = []
+    bundled = read_bundle(bundle_path)
+    # Held while comparing and writing, so no handler read-modify-write interleaves with the rewrite
+    with data_files_lock:
+        for name, content in bundled.items():
+            path = files.get(name)
+            if path is None:
+                continue
+            encoded = json.dumps(content, indent=2, ensure_ascii=False).encode()
+            try:
+                with open(path, "rb") as f:
+                    if json.loads(f.read() or b"[]") == content:
+                        continue
+            except (OSError, ValueError):
+                pass
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+            changed.append(name)
+    return changed
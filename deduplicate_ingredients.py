@@ -1,8 +1,10 @@
-import json
 from fuzzywuzzy import fuzz
 from fuzzywuzzy import process
 import re
+import sys
 from collections import defaultdict
+from catalog_model import load_cocktails, dump_cocktails
+from build_catalog import build_catalog
 
 def normalize_ingredient_name(name):
     """Normalize ingredient names for better matching."""
@@ -46,14 +48,13 @@ def find_similar_ingredients(ingredients, threshold=85):
 def update_products_json():
     """Update products.json with deduplicated ingredients."""
     # Read the products.json file
-    with open('static/products.json', 'r', encoding='utf-8') as f:
-        products = json.load(f)
+    products = load_cocktails('static/products.json')
 
     # Collect all unique ingredient names
     all_ingredients = set()
     for product in products:
-        for ingredient in product['PIng']:
-            all_ingredients.add(ingredient['ING_Name'])
+        for ingredient in product.ingredients:
+            all_ingredients.add(ingredient.name)
 
     # Find similar ingredients
     similar_groups = find_similar_ingredients(all_ingredients)
@@ -67,13 +68,12 @@ def update_products_json():
 
     # Update products with canonical names
     for product in products:
-        for ingredient in product['PIng']:
-            if ingredient['ING_Name'] in name_mapping:
-                ingredient['ING_Name'] = name_mapping[ingredient['ING_Name']]
+        for ingredient in product.ingredients:
+            if ingredient.name in name_mapping:
+                ingredient.name = sys.intern(name_mapping[ingredient.name])
 
     # Write back to products.json
-    with open('static/products.json', 'w', encoding='utf-8') as f:
-        json.dump(products, f, indent=4)
+    dump_cocktails(products, 'static/products.json', ensure_ascii=True)
 
     # Print summary of changes
     print("\nDeduplication Summary:")
@@ -87,4 +87,5 @@ def update_products_json():
                     print(f"  - {name}")
 
 if __name__ == "__main__":
-    update_products_json() 
\ No newline at end of file
+    update_products_json()
+    build_catalog()
@@ -1,5 +1,6 @@
 import json
 import re
+from build_catalog import build_catalog
 
 def normalize_ingredient_name(name):
     # Convert to lowercase and remove common variations
@@ -88,4 +89,5 @@ def process_cocktails():
         json.dump(data, f, indent=4, ensure_ascii=False)
 
 if __name__ == "__main__":
-    process_cocktails() 
\ No newline at end of file
+    process_cocktails()
+    build_catalog()
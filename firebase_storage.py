@@ -1,46 +1,38 @@
 import os
 import json
-import socket
 import threading
-import firebase_admin
-from firebase_admin import credentials, storage
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-import base64
-
-# Initialize Firebase Admin SDK with encoded credentials
-def get_decoded_credentials():
-    try:
-        # Read the encoded credentials file
-        with open("encoded_credentials.txt", 'r') as f:
-            encoded_data = f.read()
-        
-        # Decode the credentials
-        decoded_data = base64.b64decode(encoded_data).decode()
-        credentials_dict = json.loads(decoded_data)
-        
-        # Create credentials object
-        return credentials.Certificate(credentials_dict)
-    except Exception as e:
-        print(f"Error loading credentials: {str(e)}")
-        return None
-
-# Initialize Firebase with decoded credentials
-cred = get_decoded_credentials()
-if cred:
-    firebase_admin.initialize_app(cred, {
-        'storageBucket': 'jecon-cocktail-machine.firebasestorage.app'
-    })
-else:
-    raise Exception("Failed to initialize Firebase credentials")
-
-# Get a reference to the storage service
-bucket = storage.bucket()
+import time
+from build_catalog import schedule_build
+from data_bundle import BUNDLE_NAME, BUNDLE_PATH, build_bundle, unpack_bundle
+from network_monitor import NetworkMonitor, probe
+from storage_backend import FirebaseBackend, LocalBackend, PreconditionFailed
+from sync_journal import journal, keep_conflict_copy
+from sync_manifest import SyncManifest
+from transfer_engine import TransferEngine
+
+# Storage used by every sync function, created on first use. Set
+# POURPAL_STORAGE_DIR to sync against a local directory instead of Firebase.
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            local_dir = os.environ.get("POURPAL_STORAGE_DIR")
+            _backend = LocalBackend(local_dir) if local_dir else FirebaseBackend()
+        return _backend
+
+def set_backend(backend):
+    """Use another StorageBackend, e.g. a LocalBackend with injected faults."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
 
 # Define local paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
-OFFLINE_FLAG_FILE = os.path.join(STATIC_DIR, "offline.txt")
+OFFLINE_FLAG_FILE = os.path.join(STATIC_DIR, "offline.txt")  # Left by versions before the sync journal
 LOCAL_IMG_DIR = os.path.join(STATIC_DIR, "img")
 LOCAL_UPLOAD_DIR = os.path.join(LOCAL_IMG_DIR, "upload")
 
@@ -49,130 +41,285 @@ os.makedirs(STATIC_DIR, exist_ok=True)
 os.makedirs(LOCAL_IMG_DIR, exist_ok=True)
 os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
 
-# Create a thread pool for concurrent operations
-thread_pool = ThreadPoolExecutor(max_workers=4)
+# Runs every upload and download, retrying failures and adapting its
+# concurrency to how well the connection is keeping up
+transfers = TransferEngine(get_backend, sessions_path=os.path.join(STATIC_DIR, ".upload_sessions.json"))
+
+# Data files and where they live in the bucket
+DATA_FILES = {
+    "data/db.json": os.path.join(STATIC_DIR, "db.json"),
+    "data/products.json": os.path.join(STATIC_DIR, "products.json"),
+    "data/config.json": os.path.join(STATIC_DIR, "config.json")
+}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+# Upload metadata for objects that need it
+OBJECT_HEADERS = {
+    BUNDLE_NAME: {"content_type": "application/json", "content_encoding": "gzip"},
+}
+
+# Content hashes and last-synced generations, so only changed objects move
+sync_manifest = SyncManifest()
+
+# Probes connectivity in the background; every sync function reads its cached state
+network = NetworkMonitor()
 
 def check_internet_connection(host="8.8.8.8", port=53, timeout=3):
     """
     Check internet connectivity by attempting to connect to a reliable host.
     Returns True if connection is successful, False otherwise.
     """
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
-    except socket.error:
-        return False
+    return probe(((host, port),), timeout=timeout)
 
 def is_online():
-    """Check if the app is online by first checking internet connectivity."""
-    # First check basic internet connectivity
-    if not check_internet_connection():
-        return False
-        
-    # If internet is available, check Firebase Storage
-    try:
-        # Try to list files in the root directory
-        bucket.list_blobs(prefix="data/", max_results=1)
-        return True
-    except Exception:
-        return False
+    """Cached connectivity from the network monitor; only the very first call waits for a probe."""
+    return network.is_online()
+
+# What the background sync is doing, for the UI; see sync_status()
+_sync_state = {"phase": "idle", "started": None, "last_sync": None, "last_error": None}
+_sync_state_lock = threading.Lock()
+RESTING_PHASES = ("idle", "offline", "error")
+
+def set_sync_phase(phase, error=None):
+    with _sync_state_lock:
+        was_resting = _sync_state["phase"] in RESTING_PHASES
+        if was_resting and phase not in RESTING_PHASES:
+            _sync_state["started"] = time.time()
+        elif not was_resting and phase == "idle":
+            _sync_state["last_sync"] = time.time()
+            _sync_state["last_error"] = None
+        if error is not None:
+            _sync_state["last_error"] = str(error)
+        _sync_state["phase"] = phase
+
+def sync_status():
+    """Phase of the background sync, connectivity, pending local changes and transfer progress."""
+    with _sync_state_lock:
+        status = dict(_sync_state)
+    status.update(online=bool(network.online), pending_changes=len(journal), transfers=transfer_progress())
+    return status
 
 def handle_offline_state():
-    """Handle offline state by creating offline flag and ensuring local files exist."""
-    # Create offline flag
-    Path(OFFLINE_FLAG_FILE).touch()
-    print("App is offline, changes will be synced when online")
-    
+    """Handle offline state by ensuring local files exist; changes wait in the sync journal."""
+    set_sync_phase("offline")
+    print(f"App is offline, {len(journal)} changes will be synced when online")
+
     # Ensure local files exist
     initialize_files()
 
 def handle_online_state():
-    """Handle online state by checking offline flag and syncing if needed."""
-    if os.path.exists(OFFLINE_FLAG_FILE):
-        # We were offline before, upload local changes
-        data_files = {
-            "data/db.json": os.path.join(STATIC_DIR, "db.json"),
-            "data/products.json": os.path.join(STATIC_DIR, "products.json"),
-            "data/config.json": os.path.join(STATIC_DIR, "config.json")
-        }
-        
-        # Submit all upload tasks to thread pool
-        futures = []
-        for remote_path, local_path in data_files.items():
-            if os.path.exists(local_path):
-                print(f"Starting upload of {local_path}")
-                future = thread_pool.submit(upload_file_thread, local_path, remote_path)
-                futures.append(future)
-        
-        # Submit image upload tasks
-        local_images = get_local_images()
-        firebase_images = get_firebase_images()
-        for img_path in local_images:
-            if img_path not in firebase_images:
-                local_path = os.path.join(STATIC_DIR, img_path)
-                if os.path.exists(local_path):
-                    print(f"Starting upload of new image: {img_path}")
-                    future = thread_pool.submit(upload_file_thread, local_path, img_path)
-                    futures.append(future)
-        
-        # Wait for all uploads to complete
-        success = True
-        for future in futures:
-            if not future.result():
-                success = False
-        
-        # Remove offline flag
-        os.remove(OFFLINE_FLAG_FILE)
-        print("App is back online, changes have been synced")
-    else:
-        # Just download latest files using threads
-        download_all_data()
-        download_new_images()
-
-def download_file_thread(remote_path, local_path):
-    """Thread function for downloading a file."""
+    """Upload the changes journaled while offline, then sync whatever else changed on either side."""
     try:
-        blob = bucket.blob(remote_path)
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        blob.download_to_filename(local_path)
-        return True
+        if os.path.exists(OFFLINE_FLAG_FILE):
+            # Offline since before the journal existed, so what changed is unknown: local edits win
+            set_sync_phase("uploading")
+            sync_data_bundle(prefer="local")
+            sync_objects(get_local_image_files(), get_remote_objects("img/"), direction="up")
+            os.remove(OFFLINE_FLAG_FILE)
+
+        set_sync_phase("uploading")
+        if replay_journal():
+            print("App is online, changes have been synced")
+        # A full three-way pass catches what no journal entry covers (scripts,
+        # the ML editor, fleet replication, files copied in by hand)
+        set_sync_phase("syncing data")
+        sync_data_bundle(keep_conflicts=True)
+        schedule_build()  # Rebuilt only if the downloads changed the catalog
+        set_sync_phase("syncing images")
+        sync_objects(get_local_image_files(), get_remote_objects("img/"), keep_conflicts=True)
     except Exception as e:
-        print(f"Error downloading {remote_path}: {str(e)}")
-        return False
+        set_sync_phase("error", error=e)
+        raise
+    set_sync_phase("idle")
 
-def upload_file_thread(local_path, remote_path):
-    """Thread function for uploading a file."""
-    try:
-        blob = bucket.blob(remote_path)
-        blob.upload_from_filename(local_path)
+def replay_journal():
+    """Upload journaled changes in order; True if none are left pending."""
+    if not journal.pending():
         return True
+    uploaded, conflicts, failed = journal.replay(
+        upload=upload_journaled,
+        download=fetch_object,
+        remote_info=lambda name: get_backend().list(prefix=name).get(name),
+        record_synced=sync_manifest.record_synced,
+    )
+    sync_manifest.save()
+    print(f"Replayed journal: {len(uploaded)} uploaded, {len(conflicts)} conflicts, {len(failed)} left for later")
+    return not failed
+
+# Wakes the sync worker when a change is journaled in this process or the network comes back
+sync_wakeup = threading.Event()
+full_sync_requested = threading.Event()
+journal.add_listener(lambda entry: sync_wakeup.set())
+_sync_worker = None
+
+def on_network_change(online):
+    if online:
+        # Whatever changed on either side while offline gets synced
+        full_sync_requested.set()
+        sync_wakeup.set()
+    else:
+        set_sync_phase("offline")
+
+network.add_listener(on_network_change)
+
+def sync_worker(interval=60):
+    """
+    Sync whenever the network comes back, replay the journal whenever
+    something is journaled, and check for journaled changes every
+    `interval` seconds (the image_handler watcher journals from another process).
+    """
+    while True:
+        sync_wakeup.wait(interval)
+        sync_wakeup.clear()
+        if not is_online():
+            continue
+        try:
+            if full_sync_requested.is_set():
+                full_sync_requested.clear()
+                handle_online_state()
+            elif journal.pending():
+                set_sync_phase("uploading")
+                replay_journal()
+                set_sync_phase("idle")
+        except Exception as e:
+            print(f"Error in sync worker: {str(e)}")
+            set_sync_phase("error", error=e)
+            network.check_now()
+
+def start_sync_worker(interval=60):
+    """Start the network monitor and the sync worker; the first probe that finds a network triggers a full sync."""
+    global _sync_worker
+    if _sync_worker is None:
+        _sync_worker = threading.Thread(target=sync_worker, args=(interval,), daemon=True)
+        _sync_worker.start()
+    network.start()
+
+def upload_journaled(local_path, name, base):
+    if name == BUNDLE_NAME:
+        build_bundle()  # Snapshot the data files as they are now
+    return transfers.upload(local_path, name, if_generation_match=base, **OBJECT_HEADERS.get(name, {}))
+
+def unpack_data_bundle():
+    """Write out the data files from a downloaded bundle and rebuild the catalog if any changed."""
+    changed = unpack_bundle()
+    if changed:
+        print(f"Updated from data bundle: {', '.join(changed)}")
+        schedule_build()
+
+# Run after an object has been downloaded
+DOWNLOAD_HOOKS = {
+    BUNDLE_NAME: unpack_data_bundle,
+}
+
+def fetch_object(name, local_path):
+    """Download an object now and return its ObjectInfo."""
+    info = transfers.download(name, local_path).result()
+    if name in DOWNLOAD_HOOKS:
+        DOWNLOAD_HOOKS[name]()
+    return info
+
+def get_remote_objects(prefix):
+    """Map every object under prefix to its (md5, generation)."""
+    return {name: (info.md5, info.generation) for name, info in get_backend().list(prefix=prefix).items()}
+
+def sync_objects(local_files, remote_objects, direction="both", prefer=None, keep_conflicts=False):
+    """
+    Transfer only the objects whose content changed since the last sync.
+
+    local_files maps object names to local paths, remote_objects maps them
+    to (md5, generation); direction limits transfers to "up" or "down".
+    Objects changed on both sides are skipped unless `prefer` picks a side,
+    or keep_conflicts is set: then the local copy is kept in the sync
+    conflicts directory and the remote version is downloaded, as when a
+    journal replay hits a conflict.
+    """
+    plan = sync_manifest.plan(sync_manifest.scan(local_files), remote_objects, prefer)
+    print(f"Sync plan: {plan}")
+    # Local changes still in the journal must not be overwritten by a download
+    journaled = {entry["name"] for entry in journal.pending()}
+
+    downloads = list(plan.download)
+    if keep_conflicts and direction in ("both", "down"):
+        for name in plan.conflicts:
+            if name in journaled or name not in local_files:
+                continue
+            conflict_path = keep_conflict_copy(name, local_files[name])
+            print(f"Conflict on {name}: taking the remote version, local copy kept as {conflict_path}")
+            downloads.append(name)
+        plan.conflicts = [name for name in plan.conflicts if name not in downloads]
+
+    futures = {}
+    if direction in ("both", "up"):
+        for name in plan.upload:
+            print(f"Starting upload of {name}")
+            # Only replace the version the plan was based on (0: the object must not exist yet)
+            generation = remote_objects.get(name, (None, 0))[1]
+            future = transfers.upload(local_files[name], name, if_generation_match=generation,
+                                      **OBJECT_HEADERS.get(name, {}))
+            futures[name] = (future, local_files[name], True)
+    if direction in ("both", "down"):
+        for name in downloads:
+            if name in journaled:
+                print(f"Not downloading {name}: it has local changes waiting to be uploaded")
+                continue
+            local_path = local_files.get(name) or os.path.join(STATIC_DIR, name)
+            print(f"Starting download of {name}")
+            future = transfers.download(name, local_path, generation=remote_objects[name][1])
+            futures[name] = (future, local_path, False)
+    for name in plan.conflicts:
+        print(f"Skipping {name}: changed both locally and remotely since the last sync")
+
+    # Wait for all transfers to complete
+    success = True
+    for name, (future, local_path, upload) in futures.items():
+        success = record_transfer(name, future, local_path, upload) and success
+    sync_manifest.save()
+    print(f"Transfers: {transfer_progress()}")
+    return success
+
+def record_transfer(name, future, local_path, upload):
+    """Wait for a transfer and record what was synced; False if it failed for good."""
+    try:
+        info = future.result()
+    except PreconditionFailed:
+        print(f"Not uploading {local_path}: {name} changed remotely since it was listed")
+        return False
     except Exception as e:
-        print(f"Error uploading {local_path}: {str(e)}")
+        print(f"Error transferring {name}: {str(e)}")
+        network.check_now()  # Find out sooner if the connection dropped
         return False
+    # Uploads report the new object's hash; a download is hashed once it is on disk
+    md5 = info.md5 if upload else sync_manifest.local_md5(name, local_path)
+    sync_manifest.record_synced(name, md5, info.generation)
+    if not upload and name in DOWNLOAD_HOOKS:
+        DOWNLOAD_HOOKS[name]()
+    return True
+
+def transfer_progress():
+    """Counts, bytes moved, current concurrency and throughput of the transfer engine."""
+    return transfers.progress()
+
+def download_file_thread(remote_path, local_path, generation=None):
+    """Download a file, retrying transient errors."""
+    future = transfers.download(remote_path, local_path, generation=generation)
+    return record_transfer(remote_path, future, local_path, upload=False)
+
+def upload_file_thread(local_path, remote_path, if_generation_match=None):
+    """Upload a file, retrying transient errors and resuming large uploads."""
+    future = transfers.upload(local_path, remote_path, if_generation_match=if_generation_match)
+    return record_transfer(remote_path, future, local_path, upload=True)
 
 def initialize_files():
     """Initialize required files if they don't exist."""
-    data_files = {
-        "data/db.json": os.path.join(STATIC_DIR, "db.json"),
-        "data/products.json": os.path.join(STATIC_DIR, "products.json"),
-        "data/config.json": os.path.join(STATIC_DIR, "config.json")
-    }
-
     # Create empty files if they don't exist
-    for local_path in data_files.values():
+    for local_path in DATA_FILES.values():
         if not os.path.exists(local_path):
             with open(local_path, 'w') as f:
                 json.dump([], f)
 
 def sync_data():
     """Sync data between Firebase Storage and local storage."""
-    # Check internet connectivity first
-    if not check_internet_connection():
-        handle_offline_state()
-        return
-
     # Initialize files first
     initialize_files()
 
@@ -184,28 +331,34 @@ def sync_data():
 def get_firebase_images():
     """Get list of all images in Firebase Storage."""
     try:
-        # Get all blobs in the img directory
-        blobs = bucket.list_blobs(prefix="img/")
-        return [blob.name for blob in blobs]
+        # Get all objects in the img directory
+        return list(get_backend().list(prefix="img/"))
     except Exception as e:
         print(f"Error getting Firebase images: {str(e)}")
         return []
 
-def get_local_images():
-    """Get list of all images in local storage."""
-    local_images = []
-    
+def get_local_image_files():
+    """Map the Firebase path of every local image to its file path."""
+    local_images = {}
+
     # Get images from img directory
-    if os.path.exists(LOCAL_IMG_DIR):
-        for root, _, files in os.walk(LOCAL_IMG_DIR):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
+    stack = [LOCAL_IMG_DIR] if os.path.exists(LOCAL_IMG_DIR) else []
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
                     # Convert local path to Firebase path format
-                    rel_path = os.path.relpath(os.path.join(root, file), STATIC_DIR)
-                    local_images.append(rel_path.replace('\\', '/'))
-    
+                    rel_path = os.path.relpath(entry.path, STATIC_DIR)
+                    local_images[rel_path.replace('\\', '/')] = entry.path
+
     return local_images
 
+def get_local_images():
+    """Get list of all images in local storage."""
+    return list(get_local_image_files())
+
 def sync_images():
     """Sync images between Firebase Storage and local storage using threads."""
     if not is_online():
@@ -213,99 +366,48 @@ def sync_images():
         return False
 
     try:
-        # Get lists of images
-        firebase_images = get_firebase_images()
-        local_images = get_local_images()
-
         # Create necessary directories if they don't exist
         os.makedirs(LOCAL_IMG_DIR, exist_ok=True)
         os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
 
-        # Submit download tasks for new images
-        download_futures = []
-        for img_path in firebase_images:
-            local_path = os.path.join(STATIC_DIR, img_path)
-            if img_path not in local_images and not os.path.exists(local_path):
-                print(f"Starting download of new image: {img_path}")
-                os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                future = thread_pool.submit(download_file_thread, img_path, local_path)
-                download_futures.append(future)
-
-        # Submit upload tasks for new images
-        upload_futures = []
-        for img_path in local_images:
-            if img_path not in firebase_images:
-                local_path = os.path.join(STATIC_DIR, img_path)
-                if os.path.exists(local_path):
-                    print(f"Starting upload of new image: {img_path}")
-                    future = thread_pool.submit(upload_file_thread, local_path, img_path)
-                    upload_futures.append(future)
-
-        # Wait for all operations to complete
-        success = True
-        for future in download_futures + upload_futures:
-            if not future.result():
-                success = False
-
-        return success
+        return sync_objects(get_local_image_files(), get_remote_objects("img/"))
     except Exception as e:
         print(f"Error syncing images: {str(e)}")
         return False
 
+def sync_data_bundle(direction="both", prefer=None, keep_conflicts=False):
+    """
+    Sync the data files as one gzipped bundle. Downloads fall back to the
+    separate data/*.json objects while the bucket has no bundle yet.
+    """
+    remote_objects = get_remote_objects("data/")
+    if BUNDLE_NAME not in remote_objects and direction != "up":
+        success = sync_objects(DATA_FILES, remote_objects, direction="down", prefer=prefer,
+                               keep_conflicts=keep_conflicts)
+        if direction == "down":
+            return success
+
+    initialize_files()
+    build_bundle()
+    remote_bundle = {name: remote_objects[name] for name in (BUNDLE_NAME,) if name in remote_objects}
+    return sync_objects({BUNDLE_NAME: BUNDLE_PATH}, remote_bundle, direction=direction, prefer=prefer,
+                        keep_conflicts=keep_conflicts)
+
 def upload_all_data():
-    """Upload all data files to Firebase Storage using threads."""
+    """Upload the data files to Firebase Storage as a compressed bundle."""
     if not is_online():
         print("Cannot upload: App is offline")
         return False
 
-    data_files = {
-        "data/db.json": os.path.join(STATIC_DIR, "db.json"),
-        "data/products.json": os.path.join(STATIC_DIR, "products.json"),
-        "data/config.json": os.path.join(STATIC_DIR, "config.json")
-    }
-
-    # Submit all upload tasks to thread pool
-    futures = []
-    for remote_path, local_path in data_files.items():
-        if os.path.exists(local_path):
-            print(f"Starting upload of {local_path}")
-            future = thread_pool.submit(upload_file_thread, local_path, remote_path)
-            futures.append(future)
-
-    # Wait for all uploads to complete
-    success = True
-    for future in futures:
-        if not future.result():
-            success = False
-
-    return success
+    return sync_data_bundle(direction="up", prefer="local")
 
 def download_all_data():
-    """Download all data files from Firebase Storage using threads."""
+    """Download the data files from Firebase Storage, as a bundle where there is one."""
     if not is_online():
         print("Cannot download: App is offline")
         return False
 
-    data_files = {
-        "data/db.json": os.path.join(STATIC_DIR, "db.json"),
-        "data/products.json": os.path.join(STATIC_DIR, "products.json"),
-        "data/config.json": os.path.join(STATIC_DIR, "config.json")
-    }
-
-    # Submit all download tasks to thread pool
-    futures = []
-    for remote_path, local_path in data_files.items():
-        print(f"Starting download of {remote_path}")
-        future = thread_pool.submit(download_file_thread, remote_path, local_path)
-        futures.append(future)
-
-    # Wait for all downloads to complete
-    success = True
-    for future in futures:
-        if not future.result():
-            success = False
-
-    return success
+    return sync_data_bundle(direction="down", prefer="remote")
 
 def upload_new_images():
     """Upload only new images that exist locally but not in Firebase."""
@@ -314,19 +416,7 @@ def upload_new_images():
         return False
 
     try:
-        firebase_images = get_firebase_images()
-        local_images = get_local_images()
-        
-        success = True
-        for img_path in local_images:
-            if img_path not in firebase_images:
-                local_path = os.path.join(STATIC_DIR, img_path)
-                if os.path.exists(local_path):
-                    print(f"Uploading new image: {img_path}")
-                    if not upload_file_thread(local_path, img_path):
-                        success = False
-        
-        return success
+        return sync_objects(get_local_image_files(), get_remote_objects("img/"), direction="up")
     except Exception as e:
         print(f"Error uploading new images: {str(e)}")
         return False
@@ -338,20 +428,7 @@ def download_new_images():
         return False
 
     try:
-        firebase_images = get_firebase_images()
-        local_images = get_local_images()
-        
-        success = True
-        for img_path in firebase_images:
-            if img_path not in local_images:
-                local_path = os.path.join(STATIC_DIR, img_path)
-                if not os.path.exists(local_path):
-                    print(f"Downloading new image: {img_path}")
-                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                    if not download_file_thread(img_path, local_path):
-                        success = False
-        
-        return success
+        return sync_objects(get_local_image_files(), get_remote_objects("img/"), direction="down")
     except Exception as e:
         print(f"Error downloading new images: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
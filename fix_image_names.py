@@ -1,6 +1,7 @@
-import json
 from fuzzywuzzy import process
 from pathlib import Path
+from catalog_model import load_cocktails, dump_cocktails
+from build_catalog import build_catalog
 
 def normalize_name(name):
     """Normalize names for better matching."""
@@ -9,9 +10,9 @@ def normalize_name(name):
     return name
 
 def get_product_identifier(product):
-    if 'PNID' in product and product['PNID']:
-        return product['PNID']
-    return product['PName'].lower().replace(' ', '_')
+    if product.nid:
+        return product.nid
+    return product.name.lower().replace(' ', '_')
 
 def format_image_name(name):
     """Format image name with underscores."""
@@ -42,8 +43,7 @@ def find_best_image(product_id, image_files, threshold=70):
     return None
 
 def update_product_images():
-    with open('static/products.json', 'r', encoding='utf-8') as f:
-        products = json.load(f)
+    products = load_cocktails('static/products.json')
 
     upload_dir = Path('static/img/upload')
     image_files = list(upload_dir.glob('recipe_*.png'))
@@ -58,14 +58,13 @@ def update_product_images():
             # Format the image name with underscores
             formatted_name = format_image_name(best_img.stem)
             new_path = f"img/upload/{formatted_name}.png"
-            if product.get('PImage') != new_path:
-                changes.append((product.get('PImage'), new_path, identifier))
-                product['PImage'] = new_path
+            if product.image != new_path:
+                changes.append((product.image, new_path, identifier))
+                product.image = new_path
         else:
             not_found.append(identifier)
 
-    with open('static/products.json', 'w', encoding='utf-8') as f:
-        json.dump(products, f, indent=4)
+    dump_cocktails(products, 'static/products.json', ensure_ascii=True)
 
     print("\nProduct Image Update Summary:")
     print("============================")
@@ -81,4 +80,5 @@ def update_product_images():
             print(f"  {ident}")
 
 if __name__ == "__main__":
-    update_product_images() 
\ No newline at end of file
+    update_product_images()
+    build_catalog()
@@ -0,0 +1,342 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from data_bundle import data_files_lock
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+STATE_PATH = os.path.join(web_dir, ".fleet_state.json")
+
+# Replicated data files: record kind -> (path, id field, image field, ensure_ascii).
+# config.json holds this unit's pipe layout and is never replicated.
+FLEET_FILES = {
+    "product": (os.path.join(web_dir, "products.json"), "PID", "PImage", False),
+    "ingredient": (os.path.join(web_dir, "db.json"), "ING_ID", "ING_IMG", True),
+}
+
+# Changes fetched per /changes request
+BATCH_SIZE = 500
+
+
+def record_hash(record):
+    """Stable content hash of a single db.json/products.json record."""
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CatalogReplica:
+    """
+    Keeps this unit's products.json and db.json in step with a catalog_server.
+
+    pull() fetches only the changes after the last version seen, in
+    batches, fetches any images they need, then rewrites each data file
+    once per batch. push() sends the records that changed locally since
+    they were last synced. The state file remembers the version and a
+    hash of every record as last synced, which is how local edits are
+    told apart from pulled ones. A record changed on both sides keeps
+    the local edit, which the next push then sends. A record this unit
+    has no hash for (as on a unit joining the fleet) is not an edit: the
+    fleet's version replaces it, and it is only pushed if the fleet
+    never sent it.
+    """
+
+    def __init__(self, server_url, state_path=STATE_PATH, files=FLEET_FILES, timeout=10, workers=4):
+        self.server_url = server_url.rstrip("/")
+        self.state_path = state_path
+        self.files = files
+        self.timeout = timeout
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.state = self._load_state()
+
+    # --- State ---
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            if state.get("server") == self.server_url:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {"server": self.server_url, "version": 0, "hashes": {}, "stamps": {}}
+
+    def _save_state(self):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.state_path)
+
+    # --- HTTP ---
+
+    def _request(self, method, path, body=None, content_type="application/json"):
+        request = urllib.request.Request(self.server_url + path, data=body, method=method)
+        if body is not None:
+            request.add_header("Content-Type", content_type)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def _has_blob(self, digest):
+        try:
+            self._request("HEAD", f"/blobs/{digest}")
+            return True
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    # --- Local records ---
+
+    def _load_records(self, kind):
+        path = self.files[kind][0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f) or []
+        except FileNotFoundError:
+            return []
+
+    def _write_records(self, kind, records):
+        path, _, _, ensure_ascii = self.files[kind]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=ensure_ascii)
+        os.replace(tmp_path, path)
+
+    def _file_stamp(self, kind):
+        try:
+            st = os.stat(self.files[kind][0])
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def _stamp(self, kind):
+        """Remember that kind's file is fully accounted for in the hashes as it is now."""
+        self.state.setdefault("stamps", {})[kind] = self._file_stamp(kind)
+
+    def _image_path(self, web_path):
+        # Data files use both "img/..." and "/img/..."
+        if not isinstance(web_path, str) or not web_path.lstrip("/").startswith("img/"):
+            return None
+        path = os.path.normpath(os.path.join(web_dir, web_path.lstrip("/")))
+        return path if path.startswith(os.path.join(web_dir, "img") + os.sep) else None
+
+    # --- Pull ---
+
+    def _fetch_image(self, web_path, digest):
+        path = self._image_path(web_path)
+        if path is None or (os.path.exists(path) and file_sha256(path) == digest):
+            return
+        data = self._request("GET", f"/blobs/{digest}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Image {web_path} does not match its hash")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _apply(self, changes):
+        """Apply one batch; returns the kinds whose file changed."""
+        # Images first, so no record is written before what it shows is on disk
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self._fetch_image, web_path, digest)
+                           for change in changes for web_path, digest in change.get("images", {}).items()]:
+                future.result()
+
+        hashes = self.state["hashes"]
+        changed_kinds = set()
+        by_kind = {}
+        for change in changes:
+            by_kind.setdefault(change["kind"], []).append(change)
+        for kind, kind_changes in by_kind.items():
+            if kind not in self.files:
+                continue
+            id_field = self.files[kind][1]
+            # Held from the read to the rewrite, so an edit app.py saves in between isn't overwritten
+            with data_files_lock:
+                # Whether the file had no unpushed edits, so it stays accounted for after the rewrite
+                accounted = self.state.get("stamps", {}).get(kind) == self._file_stamp(kind)
+                records = self._load_records(kind)
+                index = {str(record.get(id_field)): position for position, record in enumerate(records)}
+                removed = set()
+                for change in kind_changes:
+                    key = f"{kind}:{change['id']}"
+                    position = index.get(change["id"])
+                    local = records[position] if position is not None and position not in removed else None
+                    incoming = change.get("record")
+                    if local is not None and local == incoming:
+                        hashes[key] = record_hash(incoming)  # Usually our own push coming back
+                        continue
+                    # No recorded hash means this unit never synced the record, so its copy is not an edit
+                    if local is not None and key in hashes and record_hash(local) != hashes[key]:
+                        print(f"Keeping local edit of {kind} {change['id']} over the fleet's version")
+                        continue
+                    if change["op"] == "delete":
+                        if local is not None:
+                            removed.add(position)
+                        hashes.pop(key, None)
+                    elif local is None:
+                        index[change["id"]] = len(records)
+                        records.append(incoming)
+                        hashes[key] = record_hash(incoming)
+                    else:
+                        records[position] = incoming
+                        hashes[key] = record_hash(incoming)
+                    changed_kinds.add(kind)
+                if kind in changed_kinds:
+                    self._write_records(kind, [r for p, r in enumerate(records) if p not in removed])
+                if accounted:
+                    self._stamp(kind)
+        return changed_kinds
+
+    def pull(self):
+        """Fetch and apply everything since the last pull; returns the number of changes applied."""
+        applied = 0
+        with self.lock:
+            while True:
+                query = urlencode({"since": self.state["version"], "limit": BATCH_SIZE})
+                reply = json.loads(self._request("GET", f"/changes?{query}"))
+                changes = reply["changes"]
+                if changes:
+                    if self._apply(changes):
+                        self.on_change()
+                    self.state["version"] = changes[-1]["version"]
+                    self._save_state()
+                    applied += len(changes)
+                if not reply["more"]:
+                    return applied
+
+    # --- Push ---
+
+    def local_changes(self):
+        """Changes to send: records added or edited since they were last synced, and deletions."""
+        hashes = self.state["hashes"]
+        stamps = self.state.setdefault("stamps", {})
+        changes = []
+        seen = set()
+        for kind, (_, id_field, image_field, _) in self.files.items():
+            if stamps.get(kind) is not None and stamps[kind] == self._file_stamp(kind):
+                # Unchanged since the last pull or push: nothing to parse or hash
+                seen.update(key for key in hashes if key.startswith(f"{kind}:"))
+                continue
+            for record in self._load_records(kind):
+                record_id = str(record.get(id_field))
+                key = f"{kind}:{record_id}"
+                seen.add(key)
+                if record_hash(record) == hashes.get(key):
+                    continue
+                images = {}
+                path = self._image_path(record.get(image_field))
+                if path is not None and os.path.exists(path):
+                    images[record[image_field]] = file_sha256(path)
+                changes.append({"kind": kind, "id": record_id, "op": "put", "record": record, "images": images})
+        for key in hashes.keys() - seen:
+            kind, record_id = key.split(":", 1)
+            changes.append({"kind": kind, "id": record_id, "op": "delete"})
+        return changes
+
+    def push(self):
+        """Send local changes, uploading images the server lacks; returns the number sent."""
+        if self.state["version"] == 0 and not self.state["hashes"]:
+            # Never synced: take the fleet's records first, or this unit's copies would overwrite them
+            self.pull()
+        with self.lock:
+            with data_files_lock:
+                # Stamped as read, so an edit saved while the push is in flight is still seen as unpushed
+                stamps = {kind: self._file_stamp(kind) for kind in self.files}
+                changes = self.local_changes()
+            if not changes:
+                self.state.setdefault("stamps", {}).update(stamps)
+                self._save_state()
+                return 0
+
+            def upload(web_path, digest):
+                if not self._has_blob(digest):
+                    with open(self._image_path(web_path), "rb") as f:
+                        self._request("PUT", f"/blobs/{digest}", f.read(), "application/octet-stream")
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                blobs = {(p, d) for change in changes for p, d in change.get("images", {}).items()}
+                for future in [pool.submit(upload, web_path, digest) for web_path, digest in blobs]:
+                    future.result()
+
+            reply = json.loads(self._request("POST", "/changes", json.dumps({"changes": changes}).encode()))
+            versions = reply["versions"]
+            base = self.state["version"]
+            if versions and versions == list(range(base + 1, base + 1 + len(versions))) \
+                    and reply["version"] == versions[-1]:
+                # Nobody else wrote in between, so there is nothing new to pull back.
+                # With no versions (every change was a no-op) nothing is known, so the next pull decides.
+                self.state["version"] = reply["version"]
+            for change in changes:
+                key = f"{change['kind']}:{change['id']}"
+                if change["op"] == "put":
+                    self.state["hashes"][key] = record_hash(change["record"])
+                else:
+                    self.state["hashes"].pop(key, None)
+            self.state.setdefault("stamps", {}).update(stamps)
+            self._save_state()
+            return len(changes)
+
+    def sync(self):
+        """Pull first, so local edits are compared against the latest fleet state, then push."""
+        pulled = self.pull()
+        pushed = self.push()
+        return pulled, pushed
+
+    def on_change(self):
+        """Called after pulled changes were written; rebuilds the prebuilt catalog."""
+        from build_catalog import schedule_build
+        schedule_build()
+
+
+def run_replica(replica, interval=30):
+    """Sync every `interval` seconds for as long as the process runs."""
+    while True:
+        try:
+            pulled, pushed = replica.sync()
+            if pulled or pushed:
+                print(f"Fleet sync: {pulled} changes pulled, {pushed} pushed")
+        except (OSError, ValueError) as e:
+            print(f"Fleet sync failed: {e}")
+        time.sleep(interval)
+
+
+def start_replica(server_url, interval=30):
+    """Start syncing with a catalog server in a daemon thread; returns the replica."""
+    replica = CatalogReplica(server_url)
+    threading.Thread(target=run_replica, args=(replica, interval), daemon=True).start()
+    return replica
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="fleet-sync", description="Sync this unit's catalog with a catalog server.")
+    parser.add_argument("command", choices=("pull", "push", "sync"))
+    parser.add_argument("--server", default=os.environ.get("POURPAL_CATALOG_SERVER"), required=not os.environ.get("POURPAL_CATALOG_SERVER"),
+                        help="catalog server URL (default: $POURPAL_CATALOG_SERVER)")
+    args = parser.parse_args()
+
+    replica = CatalogReplica(args.server)
+    if args.command == "pull":
+        print(f"{replica.pull()} changes pulled, now at version {replica.state['version']}")
+    elif args.command == "push":
+        print(f"{replica.push()} changes pushed")
+    else:
+        pulled, pushed = replica.sync()
+        print(f"{pulled} changes pulled, {pushed} pushed, now at version {replica.state['version']}")
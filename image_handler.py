@@ -1,10 +1,17 @@
 import json
 import os
 import base64
+import hashlib
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+import queue
 import time
 import threading
+from build_catalog import build_catalog
+from image_store import put_image
+from transcode import transcode_async
+from status_channel import DONE, ERROR, PROCESSING, StatusReporter, new_job_id
+from sync_journal import record_change
 
 # Define the base directory as the directory where this script is located
 base_dir = os.path.dirname(__file__)
@@ -14,106 +21,236 @@ uplaod_dir = os.path.join(img_dir, "upload") # Path to the upload directory
 db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
 products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
 
-# Create a global completion event that will be imported by app.py
-processing_complete = threading.Event()
+# Watched files and the record type each one holds
+WATCHED_FILES = {
+    os.path.abspath(db_file_path): "ingredient",
+    os.path.abspath(products_file_path): "product",
+}
+
+# Events for the same file within this window are collapsed into one pass
+DEBOUNCE_SECONDS = 0.5
+
+# Reports per-job progress to the HTTP server, which runs in another process
+status_reporter = StatusReporter()
+
+# Field holding each record type's identifier and its image
+RECORD_FIELDS = {
+    "ingredient": ("ING_ID", "ING_IMG"),
+    "product": ("PID", "PImage"),
+}
+
+
+def record_hash(record):
+    """Stable content hash of a single db.json/products.json record."""
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def is_data_url(value):
+    return isinstance(value, str) and "base64," in value
+
 
 class JsonChangeHandler(FileSystemEventHandler):
-    def __init__(self):
-        self.is_processing = False  # Flag to prevent re-entrance
-        
+    """
+    Debounced watcher for db.json and products.json.
+
+    Filesystem events only (re)start a per-file timer; when a file has
+    been quiet for the debounce window it is queued once for a single
+    worker thread, so each logical save gets exactly one processing pass.
+    The worker ignores files whose content hash matches what it last saw
+    or last wrote itself.
+    """
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.file_hashes = {}  # file path -> hash of the raw file from the last pass
+        self.record_hashes = {}  # file path -> {record key: record hash}
+        self.own_writes = {}  # file path -> hash of the content this handler last wrote
+        self.timers = {}  # file path -> pending debounce timer
+        self.queued = set()  # file paths waiting in the work queue
+        self.lock = threading.Lock()
+        self.work_queue = queue.Queue()
+        self.worker = threading.Thread(target=self.process_queue, daemon=True)
+        self.worker.start()
+
+    def schedule(self, file_path):
+        """Restart the debounce timer for a file."""
+        with self.lock:
+            timer = self.timers.get(file_path)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce, self.enqueue, args=(file_path,))
+            timer.daemon = True
+            self.timers[file_path] = timer
+            timer.start()
+
+    def enqueue(self, file_path):
+        with self.lock:
+            self.timers.pop(file_path, None)
+            if file_path in self.queued:
+                return
+            self.queued.add(file_path)
+        self.work_queue.put(file_path)
+
+    def process_queue(self):
+        while True:
+            file_path = self.work_queue.get()
+            if file_path is None:
+                break
+            # Leave the queue first so a save during this pass gets its own pass
+            with self.lock:
+                self.queued.discard(file_path)
+            self.process_json(file_path, WATCHED_FILES[file_path])
+
+    def stop(self):
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+        self.work_queue.put(None)
+        self.worker.join()
+
+    def changed_records(self, file_path, data, type_):
+        """
+        Return the (key, record) pairs whose content differs from the
+        previous pass, and {key: hash} of every record as it is now. The
+        hashes are only committed by process_json once the pass succeeded.
+        """
+        id_key, _ = RECORD_FIELDS[type_]
+        previous = self.record_hashes.get(file_path, {})
+        current = {}
+        changed = []
+        for index, record in enumerate(data):
+            key = record.get(id_key, f"#{index}")
+            digest = record_hash(record)
+            current[key] = digest
+            if previous.get(key) != digest:
+                changed.append((key, record))
+        return changed, current
+
     def process_json(self, file_path, type_):
-        self.is_processing = True  # Set the flag to indicate processing has started
-        processing_complete.clear()  # Reset the completion event
+        job_id = None
         try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
+            with open(file_path, "rb") as file:
+                raw = file.read()
 
-            # Track if any changes are made
+            # Nothing to do if the file is our own rewrite or unchanged since the last pass
+            file_hash = hashlib.sha1(raw).hexdigest()
+            if self.own_writes.get(file_path) == file_hash:
+                print(f"Ignoring own write to {file_path}")
+                return
+            if self.file_hashes.get(file_path) == file_hash:
+                return
+            data = json.loads(raw)
+
+            # Only extract images for changed records that carry a new data URL
+            _, img_key = RECORD_FIELDS[type_]
+            changed, current = self.changed_records(file_path, data, type_)
+            pending = [(key, record) for key, record in changed if is_data_url(record.get(img_key))]
             changes_made = False
-            
-            if type_ == "ingredient":
-                # Process ingredients from db.json
-                for ingredient in data:
-                    if "ING_IMG" in ingredient and ingredient["ING_IMG"]:
-                        original_img = ingredient["ING_IMG"]
-                        save_image(ingredient, "ingredient")
-                        if ingredient["ING_IMG"] != original_img:
-                            changes_made = True
-            else:
-                # Process products from products.json
-                for product in data:
-                    if "PImage" in product and product["PImage"]:
-                        original_img = product["PImage"]
-                        save_image(product, "product")
-                        if product["PImage"] != original_img:
-                            changes_made = True
+            failed = False
+            if pending:
+                job_id = new_job_id(type_)
+                status_reporter.start_job(job_id, len(pending))
+            for key, record in pending:
+                status_reporter.item(job_id, str(key), PROCESSING)
+                if save_image(record, type_):
+                    changes_made = True
+                    current[key] = record_hash(record)
+                    status_reporter.item(job_id, str(key), DONE)
+                else:
+                    # Left without a hash, so the next pass tries it again
+                    failed = True
+                    current.pop(key, None)
+                    status_reporter.item(job_id, str(key), ERROR)
 
             # Save the updated file only if changes were made
             if changes_made:
-                with open(file_path, "w") as file:
-                    json.dump(data, file, indent=2)
+                encoded = json.dumps(data, indent=2).encode()
+                with open(file_path, "wb") as file:
+                    file.write(encoded)
+                file_hash = hashlib.sha1(encoded).hexdigest()
+                self.own_writes[file_path] = file_hash
+                record_change(file_path)
+                build_catalog()
+            self.record_hashes[file_path] = current
+            if failed:
+                self.file_hashes.pop(file_path, None)
+            else:
+                self.file_hashes[file_path] = file_hash
+
+            if job_id is not None:
+                status_reporter.finish_job(job_id)
 
         except Exception as e:
-            print(f"Error processing {db_file_path}: {e}")
-        finally:
-            self.is_processing = False  # Reset the flag after processing
-            processing_complete.set()  # Set the completion event
+            print(f"Error processing {file_path}: {e}")
+            if job_id is not None:
+                status_reporter.finish_job(job_id, error=e)
+
+    def on_any_event(self, event):
+        # Editors and atomic writers replace files, so watch moves and creations too
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path and os.path.abspath(path) in WATCHED_FILES:
+                self.schedule(os.path.abspath(path))
+
+# Field holding each record type's image and the name its file is derived from
+IMAGE_FIELDS = {
+    "ingredient": ("ING_IMG", "ING_Name"),
+    "product": ("PImage", "PName"),
+}
 
 
-    def on_modified(self, event):
-        if event.src_path == db_file_path and not self.is_processing:
-            print(f"{db_file_path} has been modified.")
-            self.process_json(db_file_path, "ingredient")
-            
-        elif event.src_path == products_file_path and not self.is_processing:
-            print(f"{products_file_path} has been modified.")
-            self.process_json(products_file_path, "product")
+def write_data_url(img_data, name):
+    """
+    Decode a base64 data URL into the image store and return its web path.
+
+    Images are stored by content hash, so re-uploading the same picture
+    under any name reuses the existing file instead of writing a copy.
+    """
+    # Extract the Base64 part
+    header, encoded = img_data.split(',', 1)
+    extension = header.split(';')[0].split('/')[1]  # Get the image type
+
+    # The upload name is kept in the store's manifest
+    filename = f"{name.replace(' ', '_').lower()}.{extension}"
+    web_path = put_image(base64.b64decode(encoded), filename, extension)
+    path = os.path.join(web_dir, web_path.lstrip("/"))
+    record_change(path)
+    # WebP/AVIF variants are made in the background; the original is served until then
+    transcode_async(path)
+
+    print(f"Image {filename} saved at: {web_path}")
+    return web_path
+
+
+def extract_image(item, type_):
+    """Replace an item's data URL image with the path of the extracted file; True if it changed."""
+    img_key, name_key = IMAGE_FIELDS[type_]
+    img_data = item.get(img_key)
+    if not is_data_url(img_data):
+        return False
+    item[img_key] = write_data_url(img_data, item.get(name_key) or "image")
+    return True
+
 
 def save_image(item, type_):
-    # Create processing flag file
-    with open(os.path.join(web_dir, 'processing'), 'w') as f:
-        f.write('1')
-        
-    if type_ == "ingredient":
-        img_data = item.get("ING_IMG")
-        name = item.get("ING_Name")
-        img_key = "ING_IMG"
-    else:
-        img_data = item.get("PImage")
-        name = item.get("PName")
-        img_key = "PImage"
-    
+    """Extract an item's uploaded image; returns True if its data URL was replaced."""
+    img_key, name_key = IMAGE_FIELDS[type_]
+    img_data = item.get(img_key)
+    name = item.get(name_key)
+
     # Check if the image data is in Base64 format
-    if img_data and 'base64,' in img_data:
-        print(f"Processing Base64 image data for {name}: {img_data}")
+    if is_data_url(img_data):
+        print(f"Processing Base64 image data for {name}")
         try:
-            # Extract the Base64 part
-            header, encoded = img_data.split(',', 1)
-            extension = header.split(';')[0].split('/')[1]  # Get the image type
-
-            # Create a filename based on the name and extension
-            filename = f"{name.replace(' ', '_').lower()}.{extension}"
-            file_path = os.path.join(uplaod_dir, filename)
-
-            # Write the image to a file
-            with open(file_path, "wb") as img_file:
-                img_file.write(base64.b64decode(encoded))
-            
-            # Update the item's image path
-            item[img_key] = f"/img/upload/{filename}"
-
-            print(f"Image saved at: {file_path}")
-            
-            # Remove processing flag file after successful save
-            flag_path = os.path.join(web_dir, 'processing')
-            if os.path.exists(flag_path):
-                os.remove(flag_path)
+            return extract_image(item, type_)
         except Exception as e:
             print(f"Error saving image for {name}: {e}")
 
     # Check if the image data is a file path
-    elif img_data and img_data.startswith("/img/upload/"):
+    elif img_data and img_data.startswith(("/img/upload/", "/img/store/")):
         print(f"Image already formatted for {name}: {img_data}")
+    return False
 
 # Start watching for changes in db.json
 def start_watching():
@@ -129,6 +266,7 @@ def start_watching():
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    event_handler.stop()
 
 if __name__ == "__main__":
     # Start watching
@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from catalog_model import dump_cocktails, dump_ingredients, load_cocktails, load_ingredients
+from transcode import variant_dir, variants_dir
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+img_dir = os.path.join(web_dir, "img")  # Path to the img directory
+upload_dir = os.path.join(img_dir, "upload")  # Legacy name-addressed uploads
+store_dir = os.path.join(img_dir, "store")  # Content-addressed image blobs
+manifest_path = os.path.join(store_dir, "manifest.json")  # Upload name -> blob
+db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
+products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
+
+# Image field of each data file's records
+REFERENCE_FIELDS = {
+    db_file_path: "ING_IMG",
+    products_file_path: "PImage",
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+# Blobs younger than this are never collected: an upload writes its blob
+# before the request that references it has saved the data file
+GC_GRACE_SECONDS = 3600
+
+_manifest_lock = threading.Lock()
+
+
+def _web_path(path):
+    """Turn a file under static/ into the img/... form the data files use."""
+    return os.path.relpath(path, web_dir).replace("\\", "/")
+
+
+def _normalize_ref(ref):
+    return ref.lstrip("/") if isinstance(ref, str) else None
+
+
+def blob_path(digest, extension):
+    return os.path.join(store_dir, digest[:2], f"{digest}.{extension}")
+
+
+def load_manifest(path=manifest_path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"names": {}}
+
+
+def _save_manifest(manifest, path=manifest_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def put_image(data, name, extension):
+    """
+    Store image bytes under their SHA-256 and return the web path.
+
+    Identical content is written once no matter how many names point at
+    it; `name` (such as "ingredient_lime.png") is recorded in the manifest
+    so the blob behind an upload can still be found by name.
+    """
+    extension = extension.lower()
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest, extension)
+    if os.path.exists(path):
+        os.utime(path)  # Restart the GC grace period for the new reference
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    web_path = _web_path(path)
+    with _manifest_lock:
+        manifest = load_manifest()
+        if manifest["names"].get(name) != web_path:
+            manifest["names"][name] = web_path
+            _save_manifest(manifest)
+    return "/" + web_path
+
+
+def referenced_images(reference_fields=REFERENCE_FIELDS):
+    """Map every image path the data files use to the records that use it."""
+    references = {}
+    for path, field in reference_fields.items():
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        for index, record in enumerate(records):
+            ref = _normalize_ref(record.get(field))
+            if ref:
+                references.setdefault(ref, []).append((os.path.basename(path), index))
+    return references
+
+
+def static_references():
+    """Image paths hard-coded in the front end, e.g. fallback images."""
+    refs = set()
+    for entry in os.scandir(web_dir):
+        if entry.is_file() and entry.name.endswith((".js", ".html", ".css")):
+            with open(entry.path, "r", encoding="utf-8", errors="ignore") as f:
+                refs.update(re.findall(r"img/[\w./-]+", f.read()))
+    return refs
+
+
+def _iter_files(root):
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _variant_files(source_path):
+    """The transcoded copies of a source image."""
+    directory = variant_dir(source_path)
+    if not os.path.isdir(directory):
+        return directory, []
+    return directory, list(_iter_files(directory))
+
+
+def collect_garbage(dry_run=False, include_legacy=False, grace=GC_GRACE_SECONDS):
+    """
+    Mark-and-sweep unreferenced images.
+
+    Marks every image referenced by db.json, products.json and the front
+    end, then deletes unmarked store blobs (and, with include_legacy,
+    unmarked images in img/upload) older than the grace period, together
+    with their transcoded variants. Manifest names pointing at deleted
+    blobs are dropped. Returns (files, bytes); files lists the variants
+    after the image they belong to.
+    """
+    marked = set(referenced_images()) | static_references()
+    cutoff = time.time() - grace
+    roots = [store_dir] + ([upload_dir] if include_legacy else [])
+
+    removed = []
+    freed = 0
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for entry in _iter_files(root):
+            if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            st = entry.stat()
+            if _web_path(entry.path) in marked or st.st_mtime > cutoff:
+                continue
+            removed.append(_web_path(entry.path))
+            freed += st.st_size
+            if not dry_run:
+                os.remove(entry.path)
+            directory, variants = _variant_files(entry.path)
+            for variant in variants:
+                removed.append(_web_path(variant.path))
+                freed += variant.stat().st_size
+                if not dry_run:
+                    os.remove(variant.path)
+            if variants and not dry_run:
+                # Drop the now empty variant directories, stopping at img/variants
+                while directory != variants_dir:
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        break
+                    directory = os.path.dirname(directory)
+
+    if removed and not dry_run:
+        gone = set(removed)
+        with _manifest_lock:
+            manifest = load_manifest()
+            manifest["names"] = {n: p for n, p in manifest["names"].items() if p not in gone}
+            _save_manifest(manifest)
+    return removed, freed
+
+
+def import_uploads():
+    """
+    Move the legacy images the data files reference into the store.
+
+    Each referenced img/upload file is stored by content and the records
+    are repointed at the blob, so duplicates collapse to one file. The old
+    files are left for `gc --legacy` to reclaim. Returns the number of
+    references rewritten.
+    """
+    rewritten = 0
+    for path, load, dump, ensure_ascii in ((db_file_path, load_ingredients, dump_ingredients, True),
+                                           (products_file_path, load_cocktails, dump_cocktails, False)):
+        records = load(path)
+        changed = False
+        for record in records:
+            ref = _normalize_ref(record.image)
+            if not ref or not ref.startswith("img/upload/"):
+                continue
+            source = os.path.join(web_dir, ref)
+            if not os.path.isfile(source):
+                print(f"Missing image {ref}, leaving reference as is")
+                continue
+            name = os.path.basename(source)
+            extension = os.path.splitext(name)[1].lstrip(".") or "png"
+            with open(source, "rb") as f:
+                new_ref = put_image(f.read(), name, extension)
+            # Keep each record's own style of leading slash
+            record.image = new_ref if record.image.startswith("/") else new_ref.lstrip("/")
+            changed = True
+            rewritten += 1
+        if changed:
+            dump(records, path, ensure_ascii=ensure_ascii)
+    return rewritten
+
+
+def store_stats():
+    blobs = 0
+    blob_bytes = 0
+    if os.path.isdir(store_dir):
+        for entry in _iter_files(store_dir):
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                blobs += 1
+                blob_bytes += entry.stat().st_size
+    return {
+        "blobs": blobs,
+        "bytes": blob_bytes,
+        "names": len(load_manifest()["names"]),
+        "references": sum(len(r) for r in referenced_images().values()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="image-store", description="Manage the content-addressed image store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gc_parser = commands.add_parser("gc", help="delete images nothing references")
+    gc_parser.add_argument("--dry-run", action="store_true", help="only list what would be deleted")
+    gc_parser.add_argument("--legacy", action="store_true", help="also sweep unreferenced files in img/upload")
+    gc_parser.add_argument("--grace", type=float, default=GC_GRACE_SECONDS,
+                           help="keep files modified within this many seconds")
+    commands.add_parser("import", help="move referenced img/upload images into the store")
+    commands.add_parser("stats", help="show store size and reference counts")
+    args = parser.parse_args()
+
+    if args.command == "gc":
+        removed, freed = collect_garbage(args.dry_run, args.legacy, args.grace)
+        for path in removed:
+            print(("Would remove " if args.dry_run else "Removed ") + path)
+        variants = sum(1 for path in removed if path.startswith("img/variants/"))
+        print(f"{len(removed) - variants} images and {variants} variants, "
+              f"{freed / 1024 / 1024:.1f} MiB {'reclaimable' if args.dry_run else 'reclaimed'}")
+    elif args.command == "import":
+        from build_catalog import build_catalog
+
+        count = import_uploads()
+        print(f"Repointed {count} image references at the store")
+        if count:
+            build_catalog()
+    else:
+        print(json.dumps(store_stats(), indent=2))
@@ -0,0 +1,101 @@
+import socket
+import threading
+import time
+
+# Hosts whose TCP port answering means the internet is reachable
+PROBE_HOSTS = (("8.8.8.8", 53), ("1.1.1.1", 53))
+
+
+def probe(hosts=PROBE_HOSTS, timeout=3):
+    """True if a TCP connection to any of hosts succeeds within timeout."""
+    for host, port in hosts:
+        try:
+            # A per-socket timeout; the process-wide default stays untouched
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+class NetworkMonitor:
+    """
+    Tracks connectivity from a background thread.
+
+    The state flips only after `up_after` successful or `down_after`
+    failed probes in a row, so one dropped packet or one lucky connect
+    on flaky Wi-Fi does not start or abort a sync. Probes run every
+    `interval` seconds while online and every `offline_interval` while
+    offline. is_online() just reads the cached state, and listeners are
+    called with the new state on every change.
+    """
+
+    def __init__(self, check=probe, interval=30, offline_interval=10, up_after=2, down_after=2):
+        self.check = check
+        self.interval = interval
+        self.offline_interval = offline_interval
+        self.up_after = up_after
+        self.down_after = down_after
+        self.online = None  # Unknown until the first probe
+        self.streak = 0  # Consecutive probes disagreeing with the current state
+        self.last_change = None
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.probed = threading.Event()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.clear()
+            self.observe(self.check())
+            self.wakeup.wait(self.interval if self.online else self.offline_interval)
+
+    def observe(self, reachable):
+        """Feed in one probe result, or any other evidence such as a failed transfer."""
+        with self.lock:
+            if self.online is None:
+                changed = True  # The first probe decides right away
+            elif reachable == self.online:
+                self.streak = 0
+                changed = False
+            else:
+                self.streak += 1
+                changed = self.streak >= (self.up_after if reachable else self.down_after)
+            if changed:
+                self.online = reachable
+                self.streak = 0
+                self.last_change = time.time()
+        self.probed.set()
+        if changed:
+            print(f"Network is {'online' if reachable else 'offline'}")
+            for callback in self.listeners:
+                try:
+                    callback(reachable)
+                except Exception as e:
+                    print(f"Error in network listener: {e}")
+
+    def check_now(self):
+        """Probe again without waiting for the interval, e.g. after a transfer failed."""
+        self.wakeup.set()
+
+    def is_online(self, wait=None):
+        """
+        Cached connectivity. Before the first probe has finished this waits
+        up to `wait` seconds for it (starting the monitor if needed) and
+        then reports offline.
+        """
+        if self.online is None:
+            self.start()
+            self.probed.wait(wait)
+        return bool(self.online)
+
+    def add_listener(self, callback):
+        """Call callback(online) whenever the state changes."""
+        self.listeners.append(callback)
@@ -2,6 +2,7 @@ import json
 import re
 from difflib import SequenceMatcher
 from collections import defaultdict
+from build_catalog import build_catalog
 
 def normalize_word(word):
     """Normalize a single word by removing common variations."""
@@ -95,4 +96,5 @@ def process_ingredients():
         json.dump(ingredients_db, f, indent=4, ensure_ascii=False)
 
 if __name__ == "__main__":
-    process_ingredients() 
\ No newline at end of file
+    process_ingredients()
+    build_catalog()
@@ -0,0 +1,180 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+img_dir = os.path.join(web_dir, "img")  # Path to the img directory
+
+# Image directories that go into a snapshot; WebP/AVIF variants are rebuilt by transcode.py instead
+IMAGE_DIRS = (os.path.join(img_dir, "upload"), os.path.join(img_dir, "store"))
+
+MANIFEST_NAME = "MANIFEST.json"
+SNAPSHOT_FORMAT = 1
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_files():
+    """Map the static/-relative path of every file a snapshot holds to its full path."""
+    files = {}
+    for entry in os.scandir(web_dir):
+        if entry.is_file() and entry.name.endswith(".json") and not entry.name.startswith("."):
+            files[entry.name] = entry.path
+    stack = [d for d in IMAGE_DIRS if os.path.isdir(d)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and not entry.name.endswith(".tmp"):
+                    files[os.path.relpath(entry.path, web_dir).replace("\\", "/")] = entry.path
+    return files
+
+
+def export_snapshot(out_path, workers=None, level=6):
+    """
+    Write static/*.json and the image library to one .tar.gz, streamed.
+
+    The manifest of sizes and SHA-256 hashes is the first member, so an
+    import knows what to skip before the first file arrives. Returns the
+    manifest.
+    """
+    files = snapshot_files()
+    names = sorted(files)
+    # hashlib releases the GIL, so threads hash in parallel
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = list(pool.map(lambda name: file_sha256(files[name]), names))
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created": time.time(),
+        "files": {name: {"sha256": digest, "size": os.path.getsize(files[name])}
+                  for name, digest in zip(names, digests)},
+    }
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wb", compresslevel=level) as gz, tarfile.open(fileobj=gz, mode="w|") as tar:
+        encoded = json.dumps(manifest, indent=1).encode()
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(encoded)
+        info.mtime = int(manifest["created"])
+        tar.addfile(info, io.BytesIO(encoded))
+        for name in names:
+            tar.add(files[name], arcname=name, recursive=False)
+    os.replace(tmp_path, out_path)
+    return manifest
+
+
+def _safe_path(name):
+    path = os.path.normpath(os.path.join(web_dir, name))
+    if os.path.isabs(name) or not path.startswith(web_dir + os.sep):
+        raise ValueError(f"Refusing to extract outside static/: {name}")
+    return path
+
+
+def _is_current(path, expected):
+    """True if path already holds exactly the expected file."""
+    try:
+        if os.path.getsize(path) != expected["size"]:
+            return False
+        return file_sha256(path) == expected["sha256"]
+    except OSError:
+        return False
+
+
+def _write_verified(path, data, expected, mtime):
+    if hashlib.sha256(data).hexdigest() != expected["sha256"]:
+        raise ValueError(f"{os.path.relpath(path, web_dir)} does not match the manifest")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.utime(tmp_path, (mtime, mtime))
+    os.replace(tmp_path, path)
+
+
+def import_snapshot(in_path, workers=None, skip=()):
+    """
+    Unpack a snapshot into static/, skipping files that already match.
+
+    Local files are compared with the manifest in parallel before the
+    archive is read; members are then decompressed in order and handed to
+    threads that verify and write them. Names in `skip` (such as this
+    unit's config.json) are left alone. Returns (written, unchanged, skipped) counts.
+    """
+    written = unchanged = skipped = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool, tarfile.open(in_path, mode="r|gz") as tar:
+        first = tar.next()
+        if first is None or first.name != MANIFEST_NAME:
+            raise ValueError("Not a snapshot: the manifest is not the first member")
+        manifest = json.load(tar.extractfile(first))
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+
+        expected = manifest["files"]
+        names = [name for name in expected if name not in skip]
+        current = dict(zip(names, pool.map(lambda name: _is_current(_safe_path(name), expected[name]), names)))
+
+        writes = []
+        for member in tar:
+            if not member.isfile() or member.name not in expected:
+                continue
+            if member.name in skip:
+                skipped += 1
+            elif current.get(member.name):
+                unchanged += 1
+            else:
+                data = tar.extractfile(member).read()
+                writes.append(pool.submit(_write_verified, _safe_path(member.name), data,
+                                          expected[member.name], member.mtime))
+        for future in writes:
+            future.result()
+            written += 1
+    return written, unchanged, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="provision", description="Export or import a catalog and image snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="pack static/*.json and the image library")
+    export_parser.add_argument("path", help="snapshot to write (.tar.gz)")
+    export_parser.add_argument("--level", type=int, default=6, help="gzip level (images are already compressed)")
+    import_parser = commands.add_parser("import", help="unpack a snapshot, skipping files that already match")
+    import_parser.add_argument("path", help="snapshot to read (.tar.gz)")
+    import_parser.add_argument("--keep-config", action="store_true", help="keep this unit's config.json")
+    for command_parser in (export_parser, import_parser):
+        command_parser.add_argument("--workers", type=int, default=None, help="hashing/writing threads")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "export":
+        manifest = export_snapshot(args.path, workers=args.workers, level=args.level)
+        total = sum(f["size"] for f in manifest["files"].values())
+        print(f"Exported {len(manifest['files'])} files ({total / 1024 / 1024:.1f} MiB) to {args.path} "
+              f"({os.path.getsize(args.path) / 1024 / 1024:.1f} MiB) in {time.perf_counter() - start:.1f}s")
+    else:
+        try:
+            written, unchanged, skipped = import_snapshot(
+                args.path, workers=args.workers, skip=("config.json",) if args.keep_config else ())
+        except (ValueError, tarfile.TarError) as e:
+            print(f"Import failed: {e}")
+            sys.exit(1)
+        if written:
+            from build_catalog import build_catalog
+            build_catalog()
+        print(f"Imported {written} files, {unchanged} already up to date, {skipped} kept "
+              f"in {time.perf_counter() - start:.1f}s")
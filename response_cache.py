@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache for responses derived from the JSON data files.
+
+    Each entry lists the data sources it was computed from. A source's
+    version is its write generation (bumped by the server on every write)
+    together with the file's (mtime, size), so edits made by other
+    processes invalidate entries as exactly as the server's own writes.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (stamp, body, headers)
+        self.sources = {}  # source name -> file path
+        self.generations = {}  # source name -> write generation
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register_source(self, name, path):
+        """Declare a data source entries can depend on."""
+        with self.lock:
+            self.sources[name] = path
+            self.generations.setdefault(name, 0)
+
+    def bump(self, *names):
+        """Mark sources as written; every entry depending on them goes stale."""
+        with self.lock:
+            for name in names:
+                self.generations[name] = self.generations.get(name, 0) + 1
+
+    def _stamp(self, depends_on):
+        stamp = []
+        for name in depends_on:
+            try:
+                st = os.stat(self.sources[name])
+                file_stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                file_stamp = None
+            stamp.append((self.generations.get(name, 0), file_stamp))
+        return tuple(stamp)
+
+    def get(self, key, depends_on):
+        """Return (body, headers) if a fresh entry exists, else None."""
+        stamp = self._stamp(depends_on)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, key, depends_on, body, headers, stamp=None):
+        """Store a response computed from the sources as they were at `stamp`."""
+        if stamp is None:
+            stamp = self._stamp(depends_on)
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[key] = (stamp, body, headers)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[1])
+                self.evictions += 1
+
+    def get_or_compute(self, key, depends_on, compute):
+        """
+        Return a cached (body, headers) or build it with compute().
+
+        The stamp is taken before computing, so a write that lands while
+        compute() runs leaves the stored entry already stale.
+        """
+        cached = self.get(key, depends_on)
+        if cached is not None:
+            return cached
+        stamp = self._stamp(depends_on)
+        body, headers = compute()
+        self.put(key, depends_on, body, headers, stamp)
+        return body, headers
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "generations": dict(self.generations),
+            }
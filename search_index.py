@@ -0,0 +1,357 @@
+import heapq
+import os
+import re
+import threading
+from bisect import bisect_left
+
+from catalog_snapshot import open_catalog
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+db_file_path = os.path.join(web_dir, "db.json")  # Path to db.json
+products_file_path = os.path.join(web_dir, "products.json")  # Path to products.json
+
+# Relative weight of a match in each indexed field
+FIELD_WEIGHTS = {
+    "name": 10.0,
+    "nid": 8.0,
+    "ingredient": 4.0,
+    "alias": 3.0,
+    "desc": 1.0,
+    "htm": 0.5,
+}
+
+# Words that appear in nearly every description and add nothing to ranking
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "of", "on", "or", "the", "to", "with",
+}
+
+# Limits that keep a single query cheap on very large catalogs
+MAX_PREFIX_EXPANSIONS = 64
+MAX_FUZZY_CANDIDATES = 32
+MIN_FUZZY_SIMILARITY = 0.45
+
+_token_re = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens, dropping stopwords."""
+    if not text:
+        return []
+    return [t for t in _token_re.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def trigrams(token):
+    """Return the set of padded trigrams of a token."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over cocktails and ingredients.
+
+    Tokens map to the documents (and best field weight) they occur in; a
+    sorted vocabulary answers prefix queries and a trigram table answers
+    typo-tolerant ones. Documents can be added and removed one at a time so
+    the index follows writes without a rebuild.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}  # token -> {doc_key: weight}
+        self.doc_tokens = {}  # doc_key -> {token: weight}
+        self.docs = {}  # doc_key -> summary returned in results
+        self.trigram_index = {}  # trigram -> set of tokens
+        self.vocabulary = []  # sorted list of tokens, rebuilt lazily
+        self.vocabulary_dirty = False
+        self.source_mtimes = {}
+
+    # --- Building ---
+
+    def add_cocktail(self, cocktail):
+        """Index (or re-index) a single cocktail from products.json."""
+        fields = [
+            ("name", cocktail.get("PName")),
+            ("nid", (cocktail.get("PNID") or "").replace("_", " ")),
+            ("desc", cocktail.get("PDesc")),
+            ("htm", cocktail.get("PHtm")),
+        ]
+        for ingredient in cocktail.get("PIng") or []:
+            fields.append(("ingredient", ingredient.get("ING_Name")))
+            fields.append(("alias", (ingredient.get("ING_NID") or "").replace("_", " ")))
+
+        summary = {
+            "type": "cocktail",
+            "id": cocktail.get("PID"),
+            "name": cocktail.get("PName"),
+            "image": cocktail.get("PImage"),
+            "category": cocktail.get("PCat"),
+        }
+        self.add_document(("cocktail", str(cocktail.get("PID"))), summary, fields)
+
+    def add_ingredient(self, ingredient):
+        """Index (or re-index) a single ingredient from db.json."""
+        fields = [
+            ("name", ingredient.get("ING_Name")),
+            ("nid", (ingredient.get("ING_NID") or "").replace("_", " ")),
+        ]
+        summary = {
+            "type": "ingredient",
+            "id": ingredient.get("ING_ID"),
+            "name": ingredient.get("ING_Name"),
+            "image": ingredient.get("ING_IMG"),
+            "category": ingredient.get("ING_Type"),
+        }
+        self.add_document(("ingredient", str(ingredient.get("ING_ID"))), summary, fields)
+
+    def add_document(self, doc_key, summary, fields):
+        """Index a document given as (field, text) pairs, replacing any previous version."""
+        tokens = {}
+        for field, text in fields:
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                if weight > tokens.get(token, 0):
+                    tokens[token] = weight
+
+        with self.lock:
+            self.remove_document(doc_key)
+            self.docs[doc_key] = summary
+            self.doc_tokens[doc_key] = tokens
+            for token, weight in tokens.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = {}
+                    for gram in trigrams(token):
+                        self.trigram_index.setdefault(gram, set()).add(token)
+                    self.vocabulary_dirty = True
+                posting[doc_key] = weight
+
+    def remove_document(self, doc_key):
+        """Drop a document and any tokens that no longer occur anywhere."""
+        with self.lock:
+            tokens = self.doc_tokens.pop(doc_key, None)
+            self.docs.pop(doc_key, None)
+            if not tokens:
+                return
+            for token in tokens:
+                posting = self.postings.get(token)
+                if posting is None:
+                    continue
+                posting.pop(doc_key, None)
+                if not posting:
+                    del self.postings[token]
+                    for gram in trigrams(token):
+                        grams = self.trigram_index.get(gram)
+                        if grams is not None:
+                            grams.discard(token)
+                            if not grams:
+                                del self.trigram_index[gram]
+                    self.vocabulary_dirty = True
+
+    def replace_ingredients(self, ingredients):
+        """Re-index the full ingredient list, e.g. after /updateIngredients."""
+        with self.lock:
+            stale = {key for key in self.docs if key[0] == "ingredient"}
+            for ingredient in ingredients:
+                self.add_ingredient(ingredient)
+                stale.discard(("ingredient", str(ingredient.get("ING_ID"))))
+            for key in stale:
+                self.remove_document(key)
+
+    def replace_cocktails(self, cocktails):
+        """Re-index the full cocktail list."""
+        with self.lock:
+            stale = {key for key in self.docs if key[0] == "cocktail"}
+            for cocktail in cocktails:
+                self.add_cocktail(cocktail)
+                stale.discard(("cocktail", str(cocktail.get("PID"))))
+            for key in stale:
+                self.remove_document(key)
+
+    # --- Querying ---
+
+    def _vocabulary(self):
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+        return self.vocabulary
+
+    def _expand_term(self, term, limit_prefixes=True):
+        """
+        Map a query term to {token: match quality} over exact, prefix and
+        fuzzy hits. With limit_prefixes, a prefix matching many tokens
+        expands to only the closest completions.
+        """
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+
+        vocabulary = self._vocabulary()
+        start = bisect_left(vocabulary, term)
+        prefixed = []
+        for i in range(start, len(vocabulary)):
+            token = vocabulary[i]
+            if not token.startswith(term):
+                break
+            if token != term:
+                prefixed.append(token)
+        # Prefer the closest completions when a short prefix matches a lot
+        max_expansions = min(MAX_PREFIX_EXPANSIONS, 8 * len(term) ** 2)
+        if limit_prefixes and len(prefixed) > max_expansions:
+            prefixed = heapq.nsmallest(max_expansions, prefixed, key=len)
+        for token in prefixed:
+            matches.setdefault(token, 0.6 + 0.3 * len(term) / len(token))
+
+        if len(term) >= 3:
+            term_grams = trigrams(term)
+            counts = {}
+            for gram in term_grams:
+                for token in self.trigram_index.get(gram, ()):
+                    counts[token] = counts.get(token, 0) + 1
+            candidates = heapq.nlargest(MAX_FUZZY_CANDIDATES, counts.items(), key=lambda kv: kv[1])
+            # Grams of the term as a word start, for typos in a half-typed word
+            start_grams = {f"  {term}"[i:i + 3] for i in range(len(term))}
+            for token, shared in candidates:
+                if token in matches:
+                    continue
+                similarity = shared / (len(term_grams) + len(token) + 2 - shared)
+                if len(term) >= 4:
+                    contained = len(start_grams & trigrams(token)) / len(start_grams)
+                    similarity = max(similarity, 0.8 * contained)
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    matches[token] = 0.5 * similarity
+        return matches
+
+    def _term_scores(self, matches, kind, candidates=None):
+        """Best score per document for one term's {token: quality} matches."""
+        term_scores = {}
+        if candidates is not None and len(candidates) < len(matches):
+            # Few documents left: look through their tokens rather than every match's postings
+            for doc_key in candidates:
+                for token, weight in self.doc_tokens[doc_key].items():
+                    quality = matches.get(token)
+                    if quality is not None and quality * weight > term_scores.get(doc_key, 0):
+                        term_scores[doc_key] = quality * weight
+            return term_scores
+        for token, quality in matches.items():
+            for doc_key, weight in self.postings[token].items():
+                if kind and doc_key[0] != kind:
+                    continue
+                if candidates is not None and doc_key not in candidates:
+                    continue
+                score = quality * weight
+                if score > term_scores.get(doc_key, 0):
+                    term_scores[doc_key] = score
+        return term_scores
+
+    def search(self, query, kind=None, limit=20):
+        """
+        Return the best matching documents for a free-text query.
+
+        Every query term has to match (exactly, as a prefix or approximately)
+        somewhere in a document for it to be returned. Unless the query ends
+        in whitespace its last word is taken to be still being typed: it is
+        kept even if it is a stopword and matched against every completion
+        found in the documents the other terms left.
+        """
+        words = _token_re.findall(str(query).lower())
+        if not words:
+            return []
+        partial = None if str(query)[-1:].isspace() else words[-1]
+        terms = [w for w in (words if partial is None else words[:-1]) if w not in STOPWORDS]
+        if not terms and partial is None:
+            return []
+
+        with self.lock:
+            scores = None
+            for term in terms:
+                term_scores = self._term_scores(self._expand_term(term), kind)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: scores[key] + s for key, s in term_scores.items() if key in scores}
+                if not scores:
+                    return []
+
+            if partial is not None:
+                term_scores = self._term_scores(self._expand_term(partial, limit_prefixes=False), kind, scores)
+                if scores is None:
+                    scores = term_scores
+                elif term_scores or partial not in STOPWORDS:
+                    # A finished stopword ("gin and") that completes nothing is just dropped
+                    scores = {key: scores[key] + s for key, s in term_scores.items()}
+                if not scores:
+                    return []
+
+            # Names starting with what was typed go first, before the top `limit` are picked
+            phrase = " ".join(words)
+            ranked = []
+            for doc_key, score in scores.items():
+                name = self.docs[doc_key].get("name") or ""
+                if " ".join(_token_re.findall(name.lower())).startswith(phrase):
+                    score += FIELD_WEIGHTS["name"]
+                ranked.append((score, -len(name), doc_key))
+
+            results = []
+            for score, _, doc_key in heapq.nlargest(limit, ranked, key=lambda item: item[:2]):
+                summary = dict(self.docs[doc_key])
+                summary["score"] = round(score, 3)
+                results.append(summary)
+            # Equal scores favour the shorter, more specific name
+            results.sort(key=lambda r: (-r["score"], len(r.get("name") or "")))
+            return results
+
+    # --- Keeping in step with the data files ---
+
+    def load_files(self, products_path=products_file_path, db_path=db_file_path):
+        """(Re)build the index from the memory-mapped catalog snapshot of products.json and db.json."""
+        with self.lock:
+            with open_catalog(products_path, db_path) as snapshot:
+                self.replace_cocktails(snapshot.products)
+                self.replace_ingredients(snapshot.ingredients)
+            self.mark_fresh(products_path, db_path)
+
+    def mark_fresh(self, *paths):
+        """Record the current mtimes of data files the index already reflects."""
+        with self.lock:
+            for path in paths:
+                try:
+                    self.source_mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    self.source_mtimes.pop(path, None)
+
+    def is_stale(self, *paths):
+        """True if any of the data files changed behind the index's back."""
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if self.source_mtimes.get(path) != mtime:
+                return True
+        return False
+
+    def refresh_if_stale(self, products_path=products_file_path, db_path=db_file_path):
+        """Reload only when the files were edited outside the HTTP server."""
+        if self.is_stale(products_path, db_path):
+            self.load_files(products_path, db_path)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.load_files()
+    print(f"Indexed {len(index.docs)} documents in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    query = " ".join(sys.argv[1:]) or "margarita"
+    start = time.perf_counter()
+    results = index.search(query)
+    print(f"Query {query!r} took {(time.perf_counter() - start) * 1000:.2f} ms")
+    for result in results:
+        print(f"  {result['score']:7.2f}  {result['type']:<10} {result['name']}")
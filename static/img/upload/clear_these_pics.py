@@ -1,8 +1,229 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageFilter
+import numpy as np
+import argparse
 import os
 import threading # To run batch processing in the background
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+try:
+    from scipy import ndimage
+except ImportError:  # SciPy is optional; border mode falls back to pure NumPy
+    ndimage = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+# Removal modes: every near-white pixel, or only near-white regions touching the border
+MODES = {
+    "all": "Near-white everywhere",
+    "border": "Near-white connected to border",
+}
+
+# Border mode leaves white garnish and foam alone, so it can afford a looser tolerance
+DEFAULT_TOLERANCE = {"all": 240, "border": 220}
+
+PREVIEW_CACHE_SIZE = 8 # Downscaled working copies kept in memory
+PREVIEW_DELAY_MS = 15 # Slider events within this window are rendered once
+
+
+def _border_seeds(mask):
+    seeds = np.zeros_like(mask)
+    seeds[0, :] = mask[0, :]
+    seeds[-1, :] = mask[-1, :]
+    seeds[:, 0] = mask[:, 0]
+    seeds[:, -1] = mask[:, -1]
+    return seeds
+
+
+def _spread_along_rows(mask, reached):
+    """Grow `reached` to cover every horizontal run of `mask` it touches."""
+    # Number each run of True values in the flattened mask; rows are split
+    # by treating every row start as the start of a new run
+    starts = mask & ~np.pad(mask, ((0, 0), (1, 0)))[:, :-1]
+    run_ids = np.cumsum(starts.ravel()).reshape(mask.shape)
+    hit = np.zeros(run_ids.max() + 1, dtype=bool)
+    hit[run_ids[reached & mask]] = True
+    return mask & hit[run_ids]
+
+
+def border_connected(mask):
+    """Pixels of `mask` 4-connected to the image border."""
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask)
+        border_labels = np.unique(labels[_border_seeds(mask)])
+        return np.isin(labels, border_labels[border_labels != 0])
+
+    # Without SciPy: alternately spread along rows and columns until nothing changes
+    reached = _border_seeds(mask)
+    while True:
+        grown = _spread_along_rows(mask, reached)
+        grown = _spread_along_rows(mask.T, grown.T).T
+        if np.array_equal(grown, reached):
+            return reached
+        reached = grown
+
+
+def remove_background(img_pil, tolerance_val, mode="all", feather=0):
+    """
+    Makes near-white pixels (R, G and B all >= tolerance_val) transparent.
+
+    mode "all" removes every such pixel; "border" removes only regions
+    connected to the image edge, keeping white details inside the subject.
+    feather softens the new edge over roughly that many pixels.
+    Takes any PIL image and returns a new RGBA image; the input is left untouched.
+    """
+    pixels = np.array(img_pil.convert("RGBA")) # H x W x 4 copy of the image
+    near_white = (pixels[..., :3] >= tolerance_val).all(axis=-1)
+    if mode == "border":
+        # Already transparent pixels count as background the fill can cross
+        background = border_connected(near_white | (pixels[..., 3] == 0))
+    else:
+        background = near_white
+
+    alpha = pixels[..., 3]
+    if feather > 0:
+        soft = Image.fromarray(background.astype(np.uint8) * 255, "L").filter(ImageFilter.GaussianBlur(feather))
+        alpha[:] = np.minimum(alpha, 255 - np.asarray(soft))
+    alpha[background] = 0
+    return Image.fromarray(pixels, "RGBA")
+
+
+def output_path_for(input_path, output_folder):
+    """Outputs are always PNG, to keep the transparency."""
+    base = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_folder, base + ".png")
+
+
+def process_file(input_path, output_path, tolerance_val, mode="all", feather=0):
+    """Remove one image's background and save it as PNG (runs in a worker process)."""
+    with Image.open(input_path) as img:
+        processed_img = remove_background(img, tolerance_val, mode, feather)
+    # Written aside and swapped in, so the output never shows half-written (it may be the input itself)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        processed_img.save(tmp_path, "PNG")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+
+def is_up_to_date(input_path, output_path):
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def batch_process(input_folder, output_folder, tolerance_val, workers=None, force=False, progress=None,
+                  mode="all", feather=0):
+    """
+    Process every image in input_folder over a pool of worker processes.
+
+    Images whose output is already newer than the input are skipped unless
+    force is set. Inputs that would write the same PNG (foo.jpg and foo.png)
+    are reported as errors, except the first in name order, instead of
+    racing each other. progress(done, total, filename) is called as files
+    finish. Returns (processed, skipped, errors).
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = []
+    outputs = {} # Output path -> the input that claimed it
+    skipped_count = 0
+    error_count = 0
+    with os.scandir(input_folder) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name) # First name wins a shared output
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            skipped_count += 1 # Count skipped non-image files
+            continue
+        output_path = output_path_for(entry.path, output_folder)
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in outputs:
+            print(f"Error processing {entry.name}: {os.path.basename(outputs[key])} also writes {os.path.basename(output_path)}")
+            error_count += 1
+            continue
+        outputs[key] = entry.path
+        if not force and is_up_to_date(entry.path, output_path):
+            skipped_count += 1
+            continue
+        jobs.append((entry.path, output_path))
+
+    processed_count = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_file, input_path, output_path, tolerance_val, mode, feather): input_path
+                       for input_path, output_path in jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                filename = os.path.basename(futures[future])
+                try:
+                    future.result()
+                    processed_count += 1
+                except Exception as e:
+                    print(f"Error processing {filename}: {e}") # Log error to console
+                    error_count += 1
+                if progress is not None:
+                    progress(done, len(jobs), filename)
+    return processed_count, skipped_count, error_count
+
+
+def load_working_copy(filepath, size):
+    """Loads an image as an RGBA copy no larger than size, for previewing."""
+    with Image.open(filepath) as img:
+        full_width = img.width
+        img.draft("RGB", size) # Lets JPEG decode straight at a reduced scale
+        working = img.convert("RGBA")
+    working.thumbnail(size, Image.Resampling.LANCZOS)
+    working.info["preview_scale"] = working.width / full_width # For scaling pixel settings like feather
+    return working
+
+
+class PreviewWorker:
+    """
+    Renders previews on a background thread.
+
+    Only the newest request is kept: submitting replaces anything not yet
+    started, and results of requests that were superseded while rendering
+    are dropped instead of being delivered.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.request = None
+        self.generation = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, render, on_done):
+        """Queues render() and calls on_done(result) from the worker if still current."""
+        with self.condition:
+            self.generation += 1
+            self.request = (self.generation, render, on_done)
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.generation += 1
+            self.request = None
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.request is None:
+                    self.condition.wait()
+                generation, render, on_done = self.request
+                self.request = None
+            try:
+                result = render()
+            except Exception as e:
+                print(f"Error updating preview: {e}") # Log error
+                continue
+            if generation == self.generation:
+                on_done(result)
+
 
 class BackgroundRemoverApp:
     """
@@ -19,8 +240,15 @@ class BackgroundRemoverApp:
         self.output_folder = tk.StringVar()
         self.image_files = []
         self.current_image_index = tk.IntVar(value=-1) # Index for preview image list
-        self.tolerance = tk.IntVar(value=240) # Default tolerance
-        self.original_img_pil = None # To hold the loaded PIL Image for preview
+        self.tolerance = tk.IntVar(value=DEFAULT_TOLERANCE["all"]) # Default tolerance
+        self.mode = tk.StringVar(value=MODES["all"]) # Removal mode, shown by its label
+        self.feather = tk.IntVar(value=0) # Edge softening in pixels
+        self.original_img_pil = None # To hold the downscaled working copy of the preview image
+        self.preview_cache = OrderedDict() # (filepath, size) -> working copy, least recently used first
+        self.preview_cache_lock = threading.Lock()
+        self.preview_worker = PreviewWorker()
+        self.prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        self.pending_preview = None # after() id of the coalesced preview update
         self.original_img_tk = None # To hold the Tkinter PhotoImage for display
         self.processed_img_tk = None # To hold the processed Tkinter PhotoImage for display
 
@@ -63,6 +291,15 @@ class BackgroundRemoverApp:
         self.tolerance_label = ttk.Label(controls_frame, textvariable=self.tolerance)
         self.tolerance_label.grid(row=1, column=2, padx=5, pady=5, sticky="e")
 
+        ttk.Label(controls_frame, text="Mode:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        mode_frame = ttk.Frame(controls_frame)
+        mode_frame.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+        mode_box = ttk.Combobox(mode_frame, textvariable=self.mode, values=list(MODES.values()), state="readonly", width=32)
+        mode_box.pack(side=tk.LEFT)
+        mode_box.bind("<<ComboboxSelected>>", self.on_mode_change)
+        ttk.Label(mode_frame, text="Feather:").pack(side=tk.LEFT, padx=(10, 2))
+        ttk.Spinbox(mode_frame, from_=0, to=10, textvariable=self.feather, width=4, command=self.update_preview).pack(side=tk.LEFT)
+
         # --- Image Preview ---
         preview_frame = ttk.Frame(main_frame, padding="10")
         preview_frame.grid(row=2, column=0, columnspan=2, sticky="nsew", pady=5)
@@ -157,9 +394,8 @@ class BackgroundRemoverApp:
 
         filepath = self.image_files[idx]
         try:
-            # Load the original image using PIL
-            self.original_img_pil = Image.open(filepath)
-            self.original_img_pil = self.original_img_pil.convert("RGBA") # Ensure RGBA
+            # Load (or reuse) a working copy at display size; the slider never touches full resolution
+            self.original_img_pil = self.get_working_copy(filepath, self.preview_size())
 
             # Update image label
             filename = os.path.basename(filepath)
@@ -167,7 +403,8 @@ class BackgroundRemoverApp:
 
             # Display original and trigger processed preview update
             self.display_image(self.original_img_pil, self.original_canvas, "original")
-            self.update_preview() # Update processed view with current tolerance
+            self.render_preview() # Update processed view with current tolerance right away
+            self.prefetch_neighbours(idx)
 
         except Exception as e:
             messagebox.showerror("Error Loading Image", f"Could not load image:\n{filepath}\n{e}")
@@ -219,45 +456,82 @@ class BackgroundRemoverApp:
         canvas_widget.image = img_tk # Keep reference
 
 
+    def preview_size(self):
+        """Size of the preview canvases, as used by display_image."""
+        canvas_width = self.processed_canvas.winfo_width()
+        canvas_height = self.processed_canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+             canvas_width = 350 # Approximate initial size
+             canvas_height = 300
+        return (canvas_width - 10, canvas_height - 10)
+
+    def get_working_copy(self, filepath, size):
+        """Returns the cached working copy of an image, loading it on a miss."""
+        key = (filepath, size)
+        with self.preview_cache_lock:
+            working = self.preview_cache.get(key)
+            if working is not None:
+                self.preview_cache.move_to_end(key)
+                return working
+        working = load_working_copy(filepath, size)
+        with self.preview_cache_lock:
+            self.preview_cache[key] = working
+            while len(self.preview_cache) > PREVIEW_CACHE_SIZE:
+                self.preview_cache.popitem(last=False)
+        return working
+
+    def prefetch_neighbours(self, idx):
+        """Loads the previous and next images' working copies in the background."""
+        size = self.preview_size()
+        for neighbour in (idx + 1, idx - 1):
+            if 0 <= neighbour < len(self.image_files):
+                future = self.prefetch_pool.submit(self.get_working_copy, self.image_files[neighbour], size)
+                future.add_done_callback(lambda f: f.exception()) # Failures surface when the image is opened
+
     def update_preview(self, *args):
-        """Applies background removal to the preview image and updates display."""
+        """Coalesces rapid slider events into one preview render."""
+        if self.pending_preview is None:
+            self.pending_preview = self.master.after(PREVIEW_DELAY_MS, self.render_preview)
+
+    def render_preview(self):
+        """Applies background removal to the preview image off the main thread and updates display."""
+        if self.pending_preview is not None:
+            self.master.after_cancel(self.pending_preview)
+            self.pending_preview = None
         if self.original_img_pil is None:
+            self.preview_worker.cancel()
             self.clear_previews(processed_only=True)
             return
 
+        working = self.original_img_pil
         tolerance_val = self.tolerance.get()
-        try:
-            # Process the original PIL image in memory
-            processed_pil = self.remove_background(self.original_img_pil, tolerance_val)
-
-            # Display the processed image
+        mode = self.selected_mode()
+        feather = self.feather.get() * working.info.get("preview_scale", 1)
+        self.preview_worker.submit(
+            lambda: self.remove_background(working, tolerance_val, mode, feather),
+            lambda processed_pil: self.master.after(0, self.show_processed, working, processed_pil),
+        )
+
+    def show_processed(self, working, processed_pil):
+        """Displays a finished preview unless another image has been loaded meanwhile."""
+        if working is self.original_img_pil:
             self.display_image(processed_pil, self.processed_canvas, "processed")
 
-        except Exception as e:
-            print(f"Error updating preview: {e}") # Log error
-            self.clear_previews(processed_only=True)
-
 
-    def remove_background(self, img_pil, tolerance_val):
+    def remove_background(self, img_pil, tolerance_val, mode="all", feather=0):
         """
         Removes background based on tolerance. Takes and returns PIL RGBA Image.
         """
-        if img_pil.mode != "RGBA":
-             img_pil = img_pil.convert("RGBA") # Ensure RGBA for processing
-
-        datas = img_pil.getdata()
-        newData = []
-        for item in datas:
-            # Check if the pixel is close to white (based on tolerance)
-            if item[0] >= tolerance_val and item[1] >= tolerance_val and item[2] >= tolerance_val:
-                # If close to white, make it fully transparent (alpha=0)
-                newData.append((item[0], item[1], item[2], 0))
-            else:
-                # Otherwise, keep the original pixel (including original alpha)
-                newData.append(item)
+        return remove_background(img_pil, tolerance_val, mode, feather)
+
+    def selected_mode(self):
+        """The MODES key for the label picked in the mode box."""
+        return next((key for key, label in MODES.items() if label == self.mode.get()), "all")
 
-        img_pil.putdata(newData)
-        return img_pil
+    def on_mode_change(self, *args):
+        """Switches to the new mode's default tolerance and refreshes the preview."""
+        self.tolerance.set(DEFAULT_TOLERANCE[self.selected_mode()])
+        self.update_preview()
 
 
     def clear_previews(self, processed_only=False):
@@ -293,6 +567,8 @@ class BackgroundRemoverApp:
         in_folder = self.input_folder.get()
         out_folder = self.output_folder.get()
         tol = self.tolerance.get()
+        mode = self.selected_mode()
+        feather = self.feather.get()
 
         if not in_folder or not os.path.isdir(in_folder):
             messagebox.showerror("Error", "Invalid input folder selected.")
@@ -314,48 +590,21 @@ class BackgroundRemoverApp:
         self.master.update_idletasks() # Update GUI before starting thread
 
         # Run processing in a thread to avoid freezing the GUI
-        processing_thread = threading.Thread(target=self.batch_process_thread, args=(in_folder, out_folder, tol), daemon=True)
+        processing_thread = threading.Thread(target=self.batch_process_thread, args=(in_folder, out_folder, tol, mode, feather), daemon=True)
         processing_thread.start()
 
 
-    def batch_process_thread(self, input_folder, output_folder, tolerance_val):
-        """The actual batch processing logic (runs in a separate thread)."""
-        processed_count = 0
-        skipped_count = 0
-        error_count = 0
+    def batch_process_thread(self, input_folder, output_folder, tolerance_val, mode="all", feather=0):
+        """The actual batch processing logic (runs in a separate thread, fanning out to worker processes)."""
+        def progress(done, total, filename):
+            # Update every 5 files or on the last file
+            if done % 5 == 0 or done == total:
+                self.master.after(0, self.update_status, f"Status: Processing {done}/{total} - {filename}")
 
         try:
-            all_files = os.listdir(input_folder)
-            total_files = len(all_files)
-            current_file_num = 0
-
-            for filename in all_files:
-                current_file_num += 1
-                input_path = os.path.join(input_folder, filename)
-                base, ext = os.path.splitext(filename)
-                output_filename = base + ".png" # Always save as PNG for transparency
-                output_path = os.path.join(output_folder, output_filename)
-
-                # Update status periodically
-                if current_file_num % 5 == 0 or current_file_num == total_files: # Update every 5 files or on the last file
-                     self.master.after(0, self.update_status, f"Status: Processing {current_file_num}/{total_files} - {filename}")
-
-                if os.path.isfile(input_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-                    try:
-                        img = Image.open(input_path)
-                        img = img.convert("RGBA") # Ensure RGBA before processing
-
-                        processed_img = self.remove_background(img, tolerance_val)
-
-                        processed_img.save(output_path, "PNG")
-                        processed_count += 1
-
-                    except Exception as e:
-                        print(f"Error processing {filename}: {e}") # Log error to console
-                        error_count += 1
-                else:
-                    if os.path.isfile(input_path):
-                        skipped_count += 1 # Count skipped non-image files
+            processed_count, skipped_count, error_count = batch_process(
+                input_folder, output_folder, tolerance_val, progress=progress, mode=mode, feather=feather
+            )
 
             # --- Processing Finished ---
             final_status = f"Status: Complete! Processed: {processed_count}, Skipped: {skipped_count}, Errors: {error_count}"
@@ -379,6 +628,29 @@ class BackgroundRemoverApp:
 
 # --- Run the application ---
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = BackgroundRemoverApp(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Remove near-white backgrounds from images.")
+    parser.add_argument("input", nargs="?", help="input folder; runs headless when given")
+    parser.add_argument("output", nargs="?", help="output folder for the PNGs")
+    parser.add_argument("--tolerance", type=int, default=None,
+                        help="0-255, pixels at or above this in R, G and B are removed (default: 240, or 220 in border mode)")
+    parser.add_argument("--mode", choices=MODES, default="all",
+                        help="'all' removes every near-white pixel, 'border' only regions touching the image edge")
+    parser.add_argument("--feather", type=int, default=0, help="soften the cut-out edge over this many pixels")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="reprocess images whose output is already up to date")
+    args = parser.parse_args()
+
+    if args.input:
+        if not args.output:
+            parser.error("an output folder is required in headless mode")
+        processed, skipped, errors = batch_process(
+            args.input, args.output, args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCE[args.mode],
+            args.workers, args.force,
+            progress=lambda done, total, filename: print(f"{done}/{total} {filename}"),
+            mode=args.mode, feather=args.feather,
+        )
+        print(f"Complete! Processed: {processed}, Skipped: {skipped}, Errors: {errors}")
+    else:
+        root = tk.Tk()
+        app = BackgroundRemoverApp(root)
+        root.mainloop()
@@ -1479,9 +1479,6 @@ document.addEventListener("DOMContentLoaded", () => {
           });
 
         if (response.ok) {
-          // Wait for image processing to complete
-          await waitForImageProcessing();
-
           // Hide loading screen
           document.getElementById("loading-page").style.display = "none";
 
@@ -2083,9 +2080,6 @@ document.addEventListener("DOMContentLoaded", () => {
           });
 
           if (response.ok) {
-            // Wait for image processing to complete
-            await waitForImageProcessing();
-
             // Hide loading screen
             document.getElementById("loading-page").style.display = "none";
 
@@ -2167,30 +2161,6 @@ async function updateNextCocktailId() {
   }
 }
 
-async function waitForImageProcessing() {
-  const maxAttempts = 30; // Maximum number of attempts (30 * 500ms = 15 seconds max)
-  let attempts = 0;
-
-  while (attempts < maxAttempts) {
-    try {
-      const response = await fetch("processing_complete");
-      if (response.ok) {
-        // Delete the flag file after successful check
-        await fetch("/delete_processing_flag", { method: "POST" });
-        return true;
-      }
-    } catch (error) {
-      console.log("Waiting for image processing to complete...");
-    }
-
-    await new Promise((resolve) => setTimeout(resolve, 500)); // Wait 500ms before next attempt
-    attempts++;
-  }
-
-  console.warn("Image processing timed out");
-  return false;
-}
-
 function showCustomAlert(message) {
   if (message) {
     document.getElementById("alert-message").innerHTML = message.replace(
@@ -2884,15 +2854,24 @@ document.getElementById("update").addEventListener("click", async function() {
     // Show a loading popup
     showPopup("Checking for updates and syncing data...", false);
     
-    // Check for updates
-    const response = await fetch("/check-updates", {
+    // Check for updates; while the server is still fetching, keep asking for a while
+    let response = await fetch("/check-updates", {
       method: "GET"
     });
+    let data = response.ok ? await response.json() : null;
+    for (let attempt = 0; data && data.checking && !data.hasUpdates && attempt < 20; attempt++) {
+      showPopup("Checking for updates...", false);
+      await new Promise(resolve => setTimeout(resolve, 3000));
+      response = await fetch("/check-updates", {
+        method: "GET"
+      });
+      data = response.ok ? await response.json() : null;
+    }
     
     if (response.ok) {
-      const data = await response.json();
-      
-      if (data.hasUpdates) {
+      if (data.checking && !data.hasUpdates) {
+        showPopup("Still checking for updates. Please try again in a minute.", true);
+      } else if (data.hasUpdates) {
         // Show update available popup with pull button
         showUpdatePopup(data.message);
       } else {
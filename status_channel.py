@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Unix datagram socket the HTTP server listens on for job updates
+STATUS_SOCKET_PATH = os.environ.get(
+    "POURPAL_STATUS_SOCKET", os.path.join(tempfile.gettempdir(), "pourpal-status.sock")
+)
+
+# How many finished jobs to remember for the status endpoints
+MAX_JOBS = 100
+
+# Job states, in the order a job moves through them
+QUEUED, PROCESSING, DONE, ERROR = "queued", "processing", "done", "error"
+
+
+def new_job_id(prefix="job"):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+class StatusBoard:
+    """
+    Latest known state of every recent image-processing job.
+
+    A job has a total item count and per-item states; updates arrive
+    either in-process (record()) or from other processes through a
+    StatusServer socket.
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()  # job id -> job dict
+
+    def record(self, message):
+        """Apply one update: {"job", "state", optional "item", "total", "error"}."""
+        job_id = message.get("job")
+        if not job_id:
+            return
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = self.jobs[job_id] = {
+                    "job": job_id,
+                    "state": QUEUED,
+                    "total": 0,
+                    "done": 0,
+                    "items": {},
+                    "started": message.get("ts", time.time()),
+                }
+                while len(self.jobs) > self.max_jobs:
+                    self.jobs.popitem(last=False)
+            else:
+                self.jobs.move_to_end(job_id)
+
+            if "total" in message:
+                job["total"] = message["total"]
+            item = message.get("item")
+            if item is not None:
+                job["items"][item] = message.get("state", PROCESSING)
+                job["done"] = sum(1 for s in job["items"].values() if s in (DONE, ERROR))
+            else:
+                job["state"] = message.get("state", job["state"])
+            if message.get("error"):
+                job["error"] = message["error"]
+            job["updated"] = message.get("ts", time.time())
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return None if job is None else json.loads(json.dumps(job))
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(list(self.jobs.values())))
+
+    def busy(self):
+        """True while any job is still queued or processing."""
+        with self.lock:
+            return any(job["state"] in (QUEUED, PROCESSING) for job in self.jobs.values())
+
+
+class StatusServer:
+    """Receives job updates from other processes on a Unix datagram socket."""
+
+    def __init__(self, board, path=STATUS_SOCKET_PATH):
+        self.board = board
+        self.path = path
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        if not hasattr(socket, "AF_UNIX"):
+            print("Status channel unavailable: no Unix domain sockets on this platform")
+            return False
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Left behind by a previous run
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return True
+
+    def serve(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                break  # Socket closed by stop()
+            try:
+                self.board.record(json.loads(data))
+            except ValueError:
+                print("Ignoring malformed status message")
+
+    def stop(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StatusReporter:
+    """
+    Sends job updates to the HTTP server, or to a local StatusBoard.
+
+    Sending never blocks or raises: if nothing is listening (the watcher
+    running on its own, say) updates are dropped.
+    """
+
+    def __init__(self, path=STATUS_SOCKET_PATH, board=None):
+        self.path = path
+        self.board = board
+        self.sock = None
+        if board is None and hasattr(socket, "AF_UNIX"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.setblocking(False)
+
+    def send(self, job_id, state, **fields):
+        message = dict(fields, job=job_id, state=state, ts=time.time())
+        if self.board is not None:
+            self.board.record(message)
+            return
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendto(json.dumps(message).encode(), self.path)
+        except OSError:
+            pass  # No server listening, or its queue is full
+
+    def start_job(self, job_id, total):
+        self.send(job_id, PROCESSING, total=total)
+
+    def item(self, job_id, item, state):
+        self.send(job_id, state, item=item)
+
+    def finish_job(self, job_id, error=None):
+        if error:
+            self.send(job_id, ERROR, error=str(error))
+        else:
+            self.send(job_id, DONE)
@@ -0,0 +1,365 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+CREDENTIALS_FILE = os.path.join(base_dir, "encoded_credentials.txt")
+STORAGE_BUCKET = "jecon-cocktail-machine.firebasestorage.app"
+
+# What list() reports about an object; md5 is base64, as Cloud Storage gives it
+ObjectInfo = namedtuple("ObjectInfo", ["name", "md5", "generation", "size", "content_encoding"])
+
+
+class StorageError(Exception):
+    """A storage operation failed; it may succeed if retried."""
+
+
+class PreconditionFailed(StorageError):
+    """A conditional put or delete found a different generation than expected."""
+
+
+class NotFound(StorageError):
+    """The object does not exist."""
+
+
+class StorageBackend:
+    """
+    Object storage as used by the sync code.
+
+    Generations identify object versions. Passing if_generation_match to
+    put() or delete() makes the call fail with PreconditionFailed unless
+    the object is currently at that generation (0: must not exist).
+
+    Backends with `resumable` set also upload in chunks: start_upload()
+    returns a JSON-serializable session, upload_chunk() sends the bytes
+    from an offset, and upload_offset() tells how far a session got, so an
+    interrupted upload can carry on from there.
+    """
+
+    resumable = False
+
+    def list(self, prefix="", max_results=None):
+        """Return {name: ObjectInfo} for objects whose name starts with prefix."""
+        raise NotImplementedError
+
+    def get(self, name, local_path, generation=None):
+        """Download an object (a specific generation if given) to local_path."""
+        raise NotImplementedError
+
+    def put(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        """Upload local_path as name and return the new object's ObjectInfo."""
+        raise NotImplementedError
+
+    def delete(self, name, if_generation_match=None):
+        raise NotImplementedError
+
+    def start_upload(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        """Open a resumable upload session for local_path."""
+        raise NotImplementedError
+
+    def upload_offset(self, session, total):
+        """Bytes the session has committed so far; NotFound if it expired."""
+        raise NotImplementedError
+
+    def upload_chunk(self, session, local_path, offset, length, total):
+        """
+        Send up to length bytes of local_path from offset. Returns the new
+        offset and, once all total bytes are in, the object's ObjectInfo.
+        """
+        raise NotImplementedError
+
+
+def _replace_from(tmp_path, local_path):
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    os.replace(tmp_path, local_path)
+
+
+class FirebaseBackend(StorageBackend):
+    """Firebase Storage bucket; the SDK is only imported and initialized on first use."""
+
+    resumable = True
+
+    def __init__(self, credentials_file=CREDENTIALS_FILE, bucket_name=STORAGE_BUCKET):
+        self.credentials_file = credentials_file
+        self.bucket_name = bucket_name
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def get_decoded_credentials(self):
+        from firebase_admin import credentials
+
+        # Read and decode the encoded credentials file
+        with open(self.credentials_file, 'r') as f:
+            encoded_data = f.read()
+        credentials_dict = json.loads(base64.b64decode(encoded_data).decode())
+        return credentials.Certificate(credentials_dict)
+
+    @property
+    def bucket(self):
+        with self._lock:
+            if self._bucket is None:
+                import firebase_admin
+                from firebase_admin import storage
+
+                try:
+                    cred = self.get_decoded_credentials()
+                except Exception as e:
+                    raise StorageError(f"Error loading credentials: {e}") from e
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(cred, {'storageBucket': self.bucket_name})
+                self._bucket = storage.bucket()
+            return self._bucket
+
+    @staticmethod
+    def _info(blob):
+        return ObjectInfo(blob.name, blob.md5_hash, blob.generation, blob.size, blob.content_encoding)
+
+    def _call(self, operation):
+        from google.api_core import exceptions
+
+        try:
+            return operation()
+        except exceptions.PreconditionFailed as e:
+            raise PreconditionFailed(str(e)) from e
+        except exceptions.NotFound as e:
+            raise NotFound(str(e)) from e
+        except exceptions.GoogleAPIError as e:
+            raise StorageError(str(e)) from e
+
+    def list(self, prefix="", max_results=None):
+        blobs = self._call(lambda: list(self.bucket.list_blobs(prefix=prefix, max_results=max_results)))
+        return {blob.name: self._info(blob) for blob in blobs}
+
+    def get(self, name, local_path, generation=None):
+        blob = self.bucket.blob(name, generation=generation)
+        tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.part"
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        # raw_download keeps gzip-encoded objects compressed, exactly as stored
+        self._call(lambda: blob.download_to_filename(tmp_path, raw_download=True))
+        _replace_from(tmp_path, local_path)
+        return self._info(blob)
+
+    def put(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        blob = self.bucket.blob(name)
+        blob.content_encoding = content_encoding
+        self._call(lambda: blob.upload_from_filename(
+            local_path, content_type=content_type, if_generation_match=if_generation_match))
+        return self._info(blob)
+
+    def delete(self, name, if_generation_match=None):
+        self._call(lambda: self.bucket.blob(name).delete(if_generation_match=if_generation_match))
+
+    def start_upload(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        blob = self.bucket.blob(name)
+        blob.content_encoding = content_encoding
+        url = self._call(lambda: blob.create_resumable_upload_session(
+            content_type=content_type, size=os.path.getsize(local_path), if_generation_match=if_generation_match))
+        return {"url": url, "name": name}
+
+    def _put_range(self, session, data, content_range):
+        # Resumable session URLs are plain PUT targets, see
+        # https://cloud.google.com/storage/docs/performing-resumable-uploads
+        response = self.bucket.client._http.put(
+            session["url"], data=data, headers={"Content-Range": content_range}, timeout=120)
+        if response.status_code == 308:
+            # "Range: bytes=0-N" lists what the server has; no header means nothing yet
+            committed = response.headers.get("Range")
+            return (int(committed.rsplit("-", 1)[1]) + 1 if committed else 0), None
+        if response.status_code in (200, 201):
+            resource = response.json()
+            return int(resource["size"]), ObjectInfo(
+                resource["name"], resource.get("md5Hash"), int(resource["generation"]),
+                int(resource["size"]), resource.get("contentEncoding"))
+        if response.status_code == 412:
+            raise PreconditionFailed(f"{session['name']} changed since the upload started")
+        if response.status_code in (404, 410):
+            raise NotFound(f"Upload session for {session['name']} expired")
+        raise StorageError(f"Upload of {session['name']} failed: HTTP {response.status_code}")
+
+    def upload_offset(self, session, total):
+        return self._put_range(session, b"", f"bytes */{total}")[0]
+
+    def upload_chunk(self, session, local_path, offset, length, total):
+        with open(local_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(min(length, total - offset))
+        if not data:
+            # Everything was sent already; asking again returns the object
+            return self._put_range(session, b"", f"bytes */{total}")
+        return self._put_range(session, data, f"bytes {offset}-{offset + len(data) - 1}/{total}")
+
+
+class LocalBackend(StorageBackend):
+    """
+    Bucket stand-in backed by a local directory.
+
+    Each object is a file under root with a JSON sidecar in root/.meta
+    holding its generation and encoding; resumable uploads are staged in
+    root/.uploads until their last chunk arrives. latency (seconds per
+    call, with +/-50% jitter), bandwidth (bytes per second) and
+    failure_rate (chance of a StorageError per call) simulate a slow or
+    flaky network, so sync code can be exercised and benchmarked offline.
+    """
+
+    resumable = True
+
+    def __init__(self, root, latency=0.0, bandwidth=None, failure_rate=0.0, seed=None):
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, ".meta"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, ".uploads"), exist_ok=True)
+
+    def _simulate(self, nbytes=0):
+        with self.lock:
+            jitter = self.random.uniform(0.5, 1.5)
+            fail = self.random.random() < self.failure_rate
+        delay = self.latency * jitter + (nbytes / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise StorageError("Injected fault")
+
+    def _path(self, name):
+        path = os.path.normpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep) or name.startswith((".meta/", ".uploads/")):
+            raise ValueError(f"Invalid object name: {name}")
+        return path
+
+    def _meta_path(self, name):
+        return os.path.join(self.root, ".meta", name + ".json")
+
+    def _read_meta(self, name):
+        try:
+            with open(self._meta_path(name), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _info(self, name, meta):
+        return ObjectInfo(name, meta["md5"], meta["generation"], meta["size"], meta.get("content_encoding"))
+
+    def list(self, prefix="", max_results=None):
+        self._simulate()
+        found = {}
+        meta_root = os.path.join(self.root, ".meta")
+        for dirpath, _, files in os.walk(meta_root):
+            for file in files:
+                if not file.endswith(".json"):
+                    continue
+                name = os.path.relpath(os.path.join(dirpath, file), meta_root)[:-5].replace(os.sep, "/")
+                if not name.startswith(prefix):
+                    continue
+                meta = self._read_meta(name)
+                if meta is not None:
+                    found[name] = self._info(name, meta)
+                if max_results is not None and len(found) >= max_results:
+                    return found
+        return found
+
+    def get(self, name, local_path, generation=None):
+        meta = self._read_meta(name)
+        if meta is None or (generation is not None and meta["generation"] != generation):
+            self._simulate()
+            raise NotFound(f"No such object: {name}" + (f" at generation {generation}" if generation else ""))
+        self._simulate(meta["size"])
+        tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.part"
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        with open(self._path(name), "rb") as src, open(tmp_path, "wb") as dst:
+            dst.write(src.read())
+        _replace_from(tmp_path, local_path)
+        return self._info(name, meta)
+
+    def put(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        with open(local_path, "rb") as f:
+            data = f.read()
+        self._simulate(len(data))
+        return self._store(name, data, if_generation_match, content_type, content_encoding)
+
+    def _store(self, name, data, if_generation_match, content_type, content_encoding):
+        path = self._path(name)
+        with self.lock:
+            meta = self._read_meta(name)
+            current = meta["generation"] if meta else 0
+            if if_generation_match is not None and if_generation_match != current:
+                raise PreconditionFailed(f"{name} is at generation {current}, not {if_generation_match}")
+            meta = {
+                "generation": max(time.time_ns() // 1000, current + 1),
+                "md5": base64.b64encode(hashlib.md5(data).digest()).decode(),
+                "size": len(data),
+                "content_type": content_type,
+                "content_encoding": content_encoding,
+            }
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            meta_path = self._meta_path(name)
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        return self._info(name, meta)
+
+    def delete(self, name, if_generation_match=None):
+        self._simulate()
+        with self.lock:
+            meta = self._read_meta(name)
+            if meta is None:
+                raise NotFound(f"No such object: {name}")
+            if if_generation_match is not None and if_generation_match != meta["generation"]:
+                raise PreconditionFailed(f"{name} is at generation {meta['generation']}, not {if_generation_match}")
+            os.remove(self._meta_path(name))
+            os.remove(self._path(name))
+
+    def start_upload(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        self._simulate()
+        self._path(name)
+        session = {
+            "name": name,
+            "staging": os.path.join(self.root, ".uploads", uuid.uuid4().hex),
+            "if_generation_match": if_generation_match,
+            "content_type": content_type,
+            "content_encoding": content_encoding,
+        }
+        open(session["staging"], "wb").close()
+        return session
+
+    def upload_offset(self, session, total):
+        self._simulate()
+        try:
+            return os.path.getsize(session["staging"])
+        except OSError:
+            raise NotFound(f"Upload session for {session['name']} expired")
+
+    def upload_chunk(self, session, local_path, offset, length, total):
+        with open(local_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(min(length, total - offset))
+        self._simulate(len(data))
+        try:
+            with open(session["staging"], "r+b") as staging:
+                staging.truncate(offset)
+                staging.seek(offset)
+                staging.write(data)
+        except FileNotFoundError:
+            raise NotFound(f"Upload session for {session['name']} expired")
+        offset += len(data)
+        if offset < total:
+            return offset, None
+        with open(session["staging"], "rb") as staging:
+            staged = staging.read()
+        try:
+            info = self._store(session["name"], staged, session["if_generation_match"],
+                               session["content_type"], session["content_encoding"])
+        finally:
+            os.remove(session["staging"])
+        return offset, info
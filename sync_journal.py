@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from data_bundle import BUNDLE_FILES, BUNDLE_NAME, BUNDLE_PATH
+from sync_manifest import MANIFEST_PATH, file_md5
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(base_dir, "static")
+JOURNAL_PATH = os.path.join(STATIC_DIR, ".sync_journal.jsonl")
+CONFLICTS_DIR = os.path.join(STATIC_DIR, ".sync_conflicts")
+
+
+def object_name(local_path):
+    """Bucket object name of a file under static/; the data files all go in the data bundle."""
+    rel_path = os.path.relpath(os.path.abspath(local_path), STATIC_DIR).replace("\\", "/")
+    if rel_path in BUNDLE_FILES:
+        return BUNDLE_NAME
+    return rel_path
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """Hold an exclusive lock on lock_path, across threads and processes."""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def keep_conflict_copy(name, local_path, when=None):
+    """Copy the local side of a conflict on name into CONFLICTS_DIR before it is overwritten; returns the copy's path."""
+    conflict_path = os.path.join(CONFLICTS_DIR, f"{name.replace('/', '_')}.{int(when or time.time())}")
+    os.makedirs(CONFLICTS_DIR, exist_ok=True)
+    shutil.copy2(local_path, conflict_path)
+    return conflict_path
+
+
+def _merge(entries):
+    """
+    Collapse repeated changes to one object into a single change that
+    keeps the first one's base and the last one's position.
+    """
+    merged = {}
+    for entry in entries:
+        first = merged.pop(entry["name"], None)
+        if first is not None:
+            entry = {**entry, "base": first["base"]}
+        merged[entry["name"]] = entry
+    return list(merged.values())
+
+
+class SyncJournal:
+    """
+    Append-only log of local changes that still have to reach the bucket.
+
+    Every write to a data file or the image store appends one JSON line
+    naming the object and the generation it was based on, i.e. the one
+    last synced. Lines survive restarts and power loss, so whatever was
+    changed offline is uploaded, in the order it happened, on reconnect.
+    Several changes to the same object collapse into one upload. Appends
+    and the rewrite after a replay hold a lock on a separate lock file,
+    so a change journaled by another process (the image_handler watcher)
+    cannot land between the rewrite reading the journal and replacing it.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, manifest_path=MANIFEST_PATH):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.manifest_path = manifest_path
+        self.lock = threading.Lock()
+        self.listeners = []
+        self._bases = {}
+        self._bases_stamp = None
+
+    def base_generation(self, name):
+        """Generation of name as of the last sync (0 if it was never synced), read from the sync manifest."""
+        try:
+            st = os.stat(self.manifest_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return 0
+        if stamp != self._bases_stamp:
+            try:
+                with open(self.manifest_path, "r") as f:
+                    synced = json.load(f).get("synced", {})
+            except (OSError, ValueError):
+                synced = {}
+            self._bases = {key: value.get("generation") for key, value in synced.items()}
+            self._bases_stamp = stamp
+        return self._bases.get(name) or 0
+
+    def record(self, local_path, name=None):
+        """Journal a change to local_path, which has just been written."""
+        name = name or object_name(local_path)
+        if name == BUNDLE_NAME:
+            local_path = BUNDLE_PATH  # Rebuilt from the data files when replayed
+        with self.lock, _file_lock(self.lock_path):
+            entry = {"name": name, "path": os.path.abspath(local_path),
+                     "base": self.base_generation(name), "time": round(time.time(), 3)}
+            line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+            # One O_APPEND write per entry, so a torn write can only ever be the last line
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for callback in self.listeners:
+            callback(entry)
+
+    def add_listener(self, callback):
+        """Call callback(entry) after each change is journaled, e.g. to wake a sync worker."""
+        self.listeners.append(callback)
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        # Only complete lines count; a torn last line is left for the next read
+        end = data.rfind(b"\n") + 1
+        entries = []
+        for line in data[:end].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries, end
+
+    def pending(self):
+        """Changes to replay, oldest first; see _merge()."""
+        return _merge(self._read()[0])
+
+    def __len__(self):
+        return len(self.pending())
+
+    def replay(self, upload, download, remote_info, record_synced):
+        """
+        Upload every pending change, conditional on its base generation.
+
+        upload(path, name, base) returns a future resolving to an
+        ObjectInfo; download(name, path) and remote_info(name) return the
+        ObjectInfo of what they fetched or found. Images are sent concurrently, but each
+        data file waits for everything journaled before it, so a catalog
+        never lands ahead of the images it references. A change the bucket
+        rejects because the object moved on is a conflict: the local copy
+        is kept in CONFLICTS_DIR and the remote version is taken. Changes
+        that fail for other reasons stay in the journal for the next call.
+        Returns (uploaded, conflicts, failed) name lists.
+        """
+        from storage_backend import PreconditionFailed
+
+        with self.lock, _file_lock(self.lock_path):
+            entries, offset = self._read()
+        pending = _merge(entries)
+        uploaded, conflicts, failed = [], [], []
+        in_flight = []
+
+        def finish(entry, future):
+            name, path = entry["name"], entry["path"]
+            try:
+                info = future.result()
+                record_synced(name, info.md5, info.generation)
+                uploaded.append(name)
+                return
+            except PreconditionFailed:
+                pass
+            except FileNotFoundError:
+                return  # Replaced or collected since; nothing left to send
+            except Exception as e:
+                print(f"Error replaying {name}: {e}")
+                failed.append(entry)
+                return
+            try:
+                local_md5 = file_md5(path)
+                remote = remote_info(name)
+                if remote is not None and remote.md5 == local_md5:
+                    # Someone else uploaded the same content
+                    record_synced(name, local_md5, remote.generation)
+                    uploaded.append(name)
+                    return
+                conflict_path = keep_conflict_copy(name, path, entry["time"])
+                info = download(name, path)
+                record_synced(name, file_md5(path), info.generation)
+                print(f"Conflict on {name}: took the remote version, local copy kept as {conflict_path}")
+                conflicts.append(name)
+            except Exception as e:
+                print(f"Error resolving conflict on {name}: {e}")
+                failed.append(entry)
+
+        for entry in pending:
+            barrier = not entry["name"].startswith("img/")
+            if barrier:
+                for earlier, future in in_flight:
+                    finish(earlier, future)
+                in_flight = []
+            try:
+                future = upload(entry["path"], entry["name"], entry["base"])
+            except FileNotFoundError:
+                continue  # Replaced or collected since; nothing left to send
+            if barrier:
+                finish(entry, future)
+            else:
+                in_flight.append((entry, future))
+        for entry, future in in_flight:
+            finish(entry, future)
+
+        # Keep what failed plus anything journaled while replaying, by any process
+        with self.lock, _file_lock(self.lock_path):
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    appended = f.read()
+            except FileNotFoundError:
+                appended = b""
+            kept = b"".join((json.dumps(entry, separators=(",", ":")) + "\n").encode() for entry in failed)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(kept + appended)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        return uploaded, conflicts, [entry["name"] for entry in failed]
+
+
+# Shared by every writer in this process
+journal = SyncJournal()
+
+
+def record_change(local_path):
+    """Journal a write to a data file or image so the next sync uploads it."""
+    try:
+        journal.record(local_path)
+    except OSError as e:
+        print(f"Error journaling change to {local_path}: {e}")
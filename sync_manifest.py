@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(base_dir, "static")
+MANIFEST_PATH = os.path.join(STATIC_DIR, ".sync_manifest.json")
+
+
+def file_md5(path):
+    """Base64 MD5 of a file, in the same form Cloud Storage reports as md5_hash."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode()
+
+
+class SyncPlan:
+    """What one sync pass has to move, by object name."""
+
+    def __init__(self):
+        self.upload = []
+        self.download = []
+        self.conflicts = []
+        self.in_sync = []
+
+    def __repr__(self):
+        return (f"SyncPlan(upload={len(self.upload)}, download={len(self.download)}, "
+                f"conflicts={len(self.conflicts)}, in_sync={len(self.in_sync)})")
+
+
+class SyncManifest:
+    """
+    Local record of content hashes and of what was last synced.
+
+    `local` caches each file's MD5 by (mtime_ns, size), so unchanged files
+    are never re-read. `synced` holds the MD5 and remote generation of
+    every object as of the last successful transfer; it is the common base
+    that tells a local edit apart from a remote one.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.local = data.get("local", {})  # name -> [mtime_ns, size, md5]
+        self.synced = data.get("synced", {})  # name -> {"md5": ..., "generation": ...}
+
+    def local_md5(self, name, path):
+        st = os.stat(path)
+        with self.lock:
+            cached = self.local.get(name)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+        md5 = file_md5(path)
+        with self.lock:
+            self.local[name] = [st.st_mtime_ns, st.st_size, md5]
+        return md5
+
+    def scan(self, files):
+        """Return {name: md5} for the {name: local path} files that exist."""
+        hashes = {}
+        for name, path in files.items():
+            try:
+                hashes[name] = self.local_md5(name, path)
+            except OSError:
+                continue
+        return hashes
+
+    def record_synced(self, name, md5, generation):
+        with self.lock:
+            self.synced[name] = {"md5": md5, "generation": generation}
+
+    def plan(self, local, remote, prefer=None):
+        """
+        Compare local {name: md5} with remote {name: (md5, generation)}.
+
+        An object moves only in the direction it changed since the last
+        sync. If both sides changed it is a conflict, unless `prefer`
+        ("local" or "remote") says which side wins.
+        """
+        plan = SyncPlan()
+        for name in local.keys() | remote.keys():
+            local_md5 = local.get(name)
+            remote_md5, generation = remote.get(name, (None, None))
+            base = self.synced.get(name)
+
+            if local_md5 is not None and local_md5 == remote_md5:
+                plan.in_sync.append(name)
+                if base is None or base.get("generation") != generation:
+                    self.record_synced(name, local_md5, generation)
+            elif remote_md5 is None:
+                plan.upload.append(name)
+            elif local_md5 is None:
+                plan.download.append(name)
+            else:
+                local_changed = base is None or base.get("md5") != local_md5
+                remote_changed = base is None or base.get("generation") != generation
+                if local_changed and not remote_changed:
+                    plan.upload.append(name)
+                elif remote_changed and not local_changed:
+                    plan.download.append(name)
+                elif prefer == "local":
+                    plan.upload.append(name)
+                elif prefer == "remote":
+                    plan.download.append(name)
+                else:
+                    plan.conflicts.append(name)
+        return plan
+
+    def save(self):
+        with self.lock:
+            data = {"local": dict(self.local), "synced": dict(self.synced)}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
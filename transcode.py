@@ -0,0 +1,212 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, features
+
+try:
+    import pillow_avif  # noqa: F401  Registers AVIF support on Pillow builds without it
+except ImportError:
+    pass
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(__file__)
+web_dir = os.path.join(base_dir, "static")  # Define `static` folder path
+img_dir = os.path.join(web_dir, "img")  # Path to the img directory
+variants_dir = os.path.join(img_dir, "variants")  # Transcoded copies
+
+# Libraries transcoded by the batch job
+SOURCE_DIRS = (os.path.join(img_dir, "upload"), os.path.join(img_dir, "store"))
+
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Widths every image is resized to (never upscaled); "full" keeps the original size
+WIDTHS = (160, 320, 640)
+
+# Output formats in order of preference, with their Content-Type and encoder options
+FORMATS = {
+    "avif": ("image/avif", {"quality": 55, "speed": 8}),
+    "webp": ("image/webp", {"quality": 80, "method": 6}),
+}
+
+
+def available_formats():
+    """Formats this Pillow build can encode; AVIF needs Pillow 11.3+ or pillow-avif-plugin."""
+    formats = ["webp"] if features.check("webp") else []
+    if "AVIF" in Image.SAVE or features.check("avif"):
+        formats.insert(0, "avif")
+    return formats
+
+
+def variant_dir(source_path):
+    """
+    Directory holding a source image's variants, mirroring its place under
+    img/. It keeps the extension, since foo.png and foo.jpg are different images.
+    """
+    rel = os.path.relpath(source_path, img_dir)
+    return os.path.join(variants_dir, rel)
+
+
+def variant_path(source_path, width, fmt):
+    label = "full" if width is None else f"{width}w"
+    return os.path.join(variant_dir(source_path), f"{label}.{fmt}")
+
+
+def _is_fresh(path, source_mtime):
+    try:
+        return os.stat(path).st_mtime >= source_mtime
+    except OSError:
+        return False
+
+
+def transcode_file(source_path, formats=None, force=False):
+    """
+    Write the missing or outdated variants of one image; returns their paths.
+
+    A variant is up to date when it is newer than its source, so rerunning
+    over an unchanged library only costs a stat per variant.
+    """
+    formats = formats or available_formats()
+    source_mtime = os.stat(source_path).st_mtime
+    written = []
+    with Image.open(source_path) as image:
+        image.load()
+        # Keep transparency for formats that support it
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        targets = [w for w in WIDTHS if w < image.width] + [None]
+        for width in targets:
+            resized = None
+            for fmt in formats:
+                out_path = variant_path(source_path, width, fmt)
+                if not force and _is_fresh(out_path, source_mtime):
+                    continue
+                if resized is None:
+                    if width is None:
+                        resized = image
+                    else:
+                        height = max(1, round(image.height * width / image.width))
+                        resized = image.resize((width, height), Image.LANCZOS)
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                tmp_path = f"{out_path}.{os.getpid()}.tmp"
+                resized.save(tmp_path, format=fmt.upper(), **FORMATS[fmt][1])
+                os.replace(tmp_path, out_path)
+                written.append(out_path)
+    return written
+
+
+def _needs_work(source_path, source_mtime, formats):
+    # Each format's full-size variant is written last, so it alone tells
+    # whether an earlier run finished this image
+    return not all(_is_fresh(variant_path(source_path, None, fmt), source_mtime) for fmt in formats)
+
+
+def find_sources(roots=SOURCE_DIRS):
+    """Yield (path, mtime) of every transcodable image under roots, via scandir."""
+    stack = [root for root in roots if os.path.isdir(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(SOURCE_EXTENSIONS):
+                    yield entry.path, entry.stat().st_mtime
+
+
+def transcode_library(roots=SOURCE_DIRS, workers=None, force=False):
+    """
+    Transcode every image under roots that has missing or outdated variants.
+
+    Images whose variants are all newer than the image are skipped
+    without being opened. Returns (sources, variants).
+    """
+    formats = available_formats()
+    pending = [path for path, mtime in find_sources(roots)
+               if force or _needs_work(path, mtime, formats)]
+    if not pending:
+        return 0, 0
+
+    variants = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(transcode_file, path, formats, force): path for path in pending}
+        for future in as_completed(futures):
+            try:
+                variants += len(future.result())
+            except Exception as e:
+                print(f"Error transcoding {futures[future]}: {e}")
+    return len(pending), variants
+
+
+# Small pool for images uploaded while the server is running
+_upload_pool = None
+_upload_pool_lock = threading.Lock()
+
+
+def transcode_async(source_path):
+    """Queue one newly saved image for transcoding in a background process."""
+    global _upload_pool
+    with _upload_pool_lock:
+        if _upload_pool is None:
+            _upload_pool = ProcessPoolExecutor(max_workers=1)
+        future = _upload_pool.submit(transcode_file, source_path)
+
+    def report(done):
+        if done.exception() is not None:
+            print(f"Error transcoding {source_path}: {done.exception()}")
+
+    future.add_done_callback(report)
+    return future
+
+
+def _accepted_types(accept):
+    accepted = set()
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(media_type.strip().lower())
+    return accepted
+
+
+def choose_variant(source_path, accept, width=None):
+    """
+    Return (path, content_type) of the smallest fresh variant the client
+    accepts, or None to serve the original.
+
+    With a width, only variants at least that wide (and the full-size
+    one) are considered.
+    """
+    try:
+        source_stat = os.stat(source_path)
+    except OSError:
+        return None
+    accepted = _accepted_types(accept)
+
+    best = None
+    for width_option in [w for w in WIDTHS if width and w >= width] + [None]:
+        for fmt, (content_type, _) in FORMATS.items():
+            if content_type not in accepted:
+                continue
+            path = variant_path(source_path, width_option, fmt)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_mtime < source_stat.st_mtime:
+                continue  # Outdated; the source changed since it was transcoded
+            if best is None or st.st_size < best[0]:
+                best = (st.st_size, path, content_type)
+    if best is None or best[0] >= source_stat.st_size:
+        return None  # Nothing usable, or the original is already smaller
+    return best[1], best[2]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="transcode", description="Build WebP/AVIF variants of the image library.")
+    parser.add_argument("paths", nargs="*", help="directories to transcode (default: img/upload and img/store)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rebuild variants that are already up to date")
+    args = parser.parse_args()
+
+    print(f"Encoding {', '.join(available_formats()) or 'nothing (no WebP/AVIF support)'}")
+    sources, variants = transcode_library(args.paths or SOURCE_DIRS, args.workers, args.force)
+    print(f"Transcoded {sources} images into {variants} variants")
@@ -0,0 +1,283 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from storage_backend import NotFound, PreconditionFailed
+
+# Files at least this big are uploaded in resumable chunks
+RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+# Resumable chunk size; Cloud Storage wants a multiple of 256 KiB
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Errors no retry can fix
+PERMANENT_ERRORS = (PreconditionFailed, NotFound, FileNotFoundError, PermissionError, ValueError)
+
+
+class TransferEngine:
+    """
+    Runs uploads and downloads with adaptive concurrency and retries.
+
+    The number of transfers allowed to run at once starts at `workers`
+    and is re-evaluated every few completions: it grows by one while
+    throughput keeps improving, shrinks by one when throughput drops, and
+    halves when close to a third of attempts fail. Failed attempts are
+    retried with full-jitter exponential backoff. Large uploads go through
+    resumable sessions, remembered in `sessions_path`, so a retry or a
+    restart continues from the last committed chunk.
+    """
+
+    def __init__(self, get_backend, workers=4, min_workers=1, max_workers=16, max_attempts=6,
+                 base_delay=0.5, max_delay=30.0, sessions_path=None):
+        self.get_backend = get_backend
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sessions_path = sessions_path
+        self.sessions = self._load_sessions()
+
+        self.condition = threading.Condition()
+        self.limit = float(workers)  # Transfers allowed to run at once
+        self.active = 0
+        self.jobs = queue.Queue()
+        self.threads = []
+        self.listeners = []
+
+        # Totals for progress()
+        self.queued = 0
+        self.done = 0
+        self.failed = 0
+        self.retries = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+
+        # Measurements for the current adjustment interval
+        self.interval_start = time.monotonic()
+        self.interval_bytes = 0
+        self.interval_completions = 0
+        self.interval_errors = 0
+        self.throughput = None  # Smoothed bytes per second
+        self.error_rate = 0.0  # Smoothed share of failed attempts
+
+    # --- Public API ---
+
+    def upload(self, local_path, name, if_generation_match=None, content_type=None, content_encoding=None):
+        """Queue an upload; the Future resolves to the new object's ObjectInfo."""
+        size = os.path.getsize(local_path)
+        return self._submit(size, lambda job: self._upload(job, local_path, name, size, if_generation_match,
+                                                           content_type, content_encoding))
+
+    def download(self, name, local_path, generation=None, size=0):
+        """Queue a download; the Future resolves to the object's ObjectInfo."""
+        return self._submit(size, lambda job: self._download(job, name, local_path, generation, size))
+
+    def progress(self):
+        with self.condition:
+            return {
+                "queued": self.queued,
+                "running": self.active,
+                "done": self.done,
+                "failed": self.failed,
+                "retries": self.retries,
+                "bytes_total": self.bytes_total,
+                "bytes_done": self.bytes_done,
+                "workers": int(self.limit),
+                "throughput": round(self.throughput or 0),
+                "error_rate": round(self.error_rate, 3),
+            }
+
+    def add_listener(self, callback):
+        """Call callback(progress dict) whenever a transfer finishes or moves bytes."""
+        self.listeners.append(callback)
+
+    # --- Scheduling ---
+
+    def _submit(self, size, work):
+        future = Future()
+        with self.condition:
+            self.queued += 1
+            self.bytes_total += size
+            # Threads are started lazily, up to the most the limit can reach
+            if len(self.threads) < min(self.max_workers, self.queued + self.active):
+                thread = threading.Thread(target=self._worker, daemon=True)
+                self.threads.append(thread)
+                thread.start()
+        self.jobs.put((future, work))
+        return future
+
+    def _acquire_slot(self):
+        with self.condition:
+            while self.active >= int(self.limit):
+                self.condition.wait()
+            self.active += 1
+
+    def _release_slot(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def _worker(self):
+        while True:
+            future, work = self.jobs.get()
+            with self.condition:
+                self.queued -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._run(future, work)
+
+    def _run(self, future, work):
+        job = {"bytes": 0}
+        attempt = 0
+        while True:
+            self._acquire_slot()
+            moved = job["bytes"]
+            try:
+                result = work(job)
+            except PERMANENT_ERRORS as e:
+                self._release_slot()
+                self._finish(future, exception=e)
+                return
+            except Exception as e:
+                self._release_slot()
+                self._record_attempt(error=True)
+                # A resumable upload that got further before failing starts a fresh count
+                attempt = attempt + 1 if job["bytes"] == moved else 1
+                if attempt == self.max_attempts:
+                    self._finish(future, exception=e)
+                    return
+                with self.condition:
+                    self.retries += 1
+                # Full jitter: anywhere between no wait and the exponential cap
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))))
+                continue
+            self._release_slot()
+            self._record_attempt(error=False)
+            self._finish(future, result=result)
+            return
+
+    def _finish(self, future, result=None, exception=None):
+        with self.condition:
+            if exception is None:
+                self.done += 1
+            else:
+                self.failed += 1
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
+        self._notify()
+
+    def _add_bytes(self, job, nbytes):
+        job["bytes"] += nbytes
+        with self.condition:
+            self.bytes_done += nbytes
+            self.interval_bytes += nbytes
+        self._notify()
+
+    def _notify(self):
+        if self.listeners:
+            snapshot = self.progress()
+            for callback in self.listeners:
+                callback(snapshot)
+
+    def _record_attempt(self, error):
+        """Count an attempt and re-evaluate the concurrency limit every few of them."""
+        with self.condition:
+            if error:
+                self.interval_errors += 1
+            else:
+                self.interval_completions += 1
+            attempts = self.interval_completions + self.interval_errors
+            elapsed = time.monotonic() - self.interval_start
+            if attempts < max(8, 2 * int(self.limit)) and (elapsed < 2.0 or attempts < 4):
+                return
+
+            # Compare this interval against smoothed history, so one large
+            # file or an unlucky run of errors doesn't swing the limit
+            throughput = self.interval_bytes / elapsed if elapsed > 0 else 0.0
+            error_rate = self.interval_errors / attempts
+            self.error_rate = error_rate if self.throughput is None else 0.7 * self.error_rate + 0.3 * error_rate
+            if not self.queued:
+                pass  # Too little work waiting to tell whether the limit matters
+            elif self.error_rate > 0.3:
+                self.limit = max(self.min_workers, self.limit / 2)
+                self.error_rate = error_rate  # Give the smaller limit a fresh start
+            elif self.throughput is not None and throughput < self.throughput * 0.9:
+                self.limit = max(self.min_workers, self.limit - 1)
+            elif self.throughput is None or throughput > self.throughput * 1.05:
+                self.limit = min(self.max_workers, self.limit + 1)
+            self.throughput = throughput if self.throughput is None else 0.7 * self.throughput + 0.3 * throughput
+
+            self.interval_start = time.monotonic()
+            self.interval_bytes = 0
+            self.interval_completions = 0
+            self.interval_errors = 0
+            self.condition.notify_all()
+
+    # --- Transfers ---
+
+    def _download(self, job, name, local_path, generation, size):
+        info = self.get_backend().get(name, local_path, generation=generation)
+        self._add_bytes(job, info.size or size)
+        return info
+
+    def _upload(self, job, local_path, name, size, if_generation_match, content_type, content_encoding):
+        backend = self.get_backend()
+        if size < RESUMABLE_THRESHOLD or not backend.resumable:
+            info = backend.put(local_path, name, if_generation_match=if_generation_match,
+                               content_type=content_type, content_encoding=content_encoding)
+            self._add_bytes(job, size)
+            return info
+
+        st = os.stat(local_path)
+        key = f"{name}|{st.st_size}|{st.st_mtime_ns}"
+        session = self.sessions.get(key)
+        offset = None
+        if session is not None:
+            try:
+                offset = backend.upload_offset(session, size)
+            except NotFound:
+                session = None  # Expired; start over
+        if session is None:
+            session = backend.start_upload(local_path, name, if_generation_match=if_generation_match,
+                                           content_type=content_type, content_encoding=content_encoding)
+            self._remember_session(key, session)
+            offset = 0
+
+        while True:
+            try:
+                new_offset, info = backend.upload_chunk(session, local_path, offset, CHUNK_SIZE, size)
+            except PERMANENT_ERRORS:
+                self._remember_session(key, None)
+                raise
+            self._add_bytes(job, new_offset - offset)
+            offset = new_offset
+            if info is not None:
+                self._remember_session(key, None)
+                return info
+
+    def _load_sessions(self):
+        if not self.sessions_path:
+            return {}
+        try:
+            with open(self.sessions_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remember_session(self, key, session):
+        with self.condition:
+            if session is None:
+                self.sessions.pop(key, None)
+            else:
+                self.sessions[key] = session
+            sessions = dict(self.sessions)
+        if self.sessions_path:
+            tmp_path = f"{self.sessions_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(sessions, f)
+            os.replace(tmp_path, self.sessions_path)
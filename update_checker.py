@@ -0,0 +1,128 @@
+import os
+import random
+import subprocess
+import threading
+import time
+
+# Define the base directory as the directory where this script is located
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class UpdateChecker:
+    """
+    Checks the git remote for new commits from a background thread.
+
+    Every `interval` seconds it fetches the one branch it watches and
+    caches how many commits HEAD is behind and the newest commit's
+    subject, so the /check-updates request only reads the cache. The
+    fetch is a plain one: a --filter or --depth fetch would quietly turn
+    the kiosk's full clone into a partial or shallow one. Failed checks
+    are retried after a backoff that doubles from `retry_delay` up to
+    `interval`, and requests for a fresh result wait out that backoff
+    too. Every git command is killed after `timeout` seconds.
+    """
+
+    def __init__(self, repo_dir=base_dir, remote="origin", branch="main", interval=900,
+                 retry_delay=30, timeout=60):
+        self.repo_dir = repo_dir
+        self.remote = remote
+        self.branch = branch
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.failures = 0
+        self.retry_at = 0  # Before this time requests don't start a check (failure backoff)
+        self.running = False
+        self.completed = 0  # Number of checks finished, successful or not
+        self.result = None  # {"commits", "latest", "checked_at"} from the last successful check
+        self.error = None
+        self.lock = threading.Lock()
+        self.checked = threading.Condition(self.lock)
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            with self.lock:
+                self.running = True  # Before clearing, so a request in between doesn't queue a second check
+                self.wakeup.clear()
+            self.check()
+            if self.failures:
+                # Full jitter, so a fleet that lost its uplink together doesn't retry together
+                delay = random.uniform(0, min(self.interval, self.retry_delay * 2 ** (self.failures - 1)))
+            else:
+                delay = self.interval
+            with self.lock:
+                self.retry_at = time.time() + delay if self.failures else 0
+            self.wakeup.wait(delay)
+
+    def check_now(self):
+        """Check again without waiting for the interval."""
+        self.wakeup.set()
+
+    def _git(self, *args):
+        # No credential prompt can hang a kiosk with nobody at the keyboard
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        return subprocess.run(["git", *args], cwd=self.repo_dir, capture_output=True, text=True,
+                              timeout=self.timeout, env=env, check=True)
+
+    def check(self):
+        """Fetch and update the cached result; returns True on success."""
+        with self.lock:
+            self.running = True
+        try:
+            self._git("fetch", self.remote, self.branch)
+            # One log call gives both the count and the newest subject
+            log = self._git("log", "--pretty=format:%s", f"HEAD..{self.remote}/{self.branch}").stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            stderr = getattr(e, "stderr", None)
+            with self.lock:
+                self.failures += 1
+                self.error = (stderr or str(e)).strip()
+                self._finish()
+            print(f"Error checking for updates: {self.error}")
+            return False
+        subjects = log.splitlines()
+        with self.lock:
+            self.failures = 0
+            self.error = None
+            self.result = {
+                "commits": len(subjects),
+                "latest": subjects[0] if subjects else None,
+                "checked_at": time.time(),
+            }
+            self._finish()
+        return True
+
+    def _finish(self):
+        # Called with the lock held
+        self.running = False
+        self.completed += 1
+        self.checked.notify_all()
+
+    def status(self, refresh_after=None, wait=0):
+        """
+        The cached result, the last error and whether a check is running.
+
+        If the result is missing or older than `refresh_after` seconds, and
+        the failure backoff allows it, a check is started and awaited for up
+        to `wait` seconds; after that the cached result is returned while
+        the check carries on in the background.
+        """
+        with self.lock:
+            stale = refresh_after is not None and (
+                self.result is None or time.time() - self.result["checked_at"] > refresh_after)
+            if stale and (self.running or time.time() >= self.retry_at):
+                started = self.completed
+                if not self.running:
+                    self.wakeup.set()
+                if wait:
+                    self.checked.wait_for(lambda: self.completed > started, timeout=wait)
+            result = dict(self.result) if self.result else None
+            return {"result": result, "error": self.error, "checking": self.running or self.wakeup.is_set()}
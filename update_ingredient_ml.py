@@ -2,6 +2,7 @@ import json
 import re
 from collections import defaultdict
 from normalize_ingredients import normalize_ingredient_name
+from build_catalog import build_catalog
 
 def extract_measurements_from_recipes(cocktail_name):
     """Extract measurements from recipes.txt for a specific cocktail."""
@@ -119,4 +120,5 @@ def update_ingredient_measurements():
         json.dump(products, f, indent=4, ensure_ascii=False)
 
 if __name__ == "__main__":
-    update_ingredient_measurements() 
\ No newline at end of file
+    update_ingredient_measurements()
+    build_catalog()